@@ -1,75 +1,179 @@
 # File: app.py
 
 import os
-from flask import Flask, request, jsonify
+import threading
+from flask import Flask, Response, request, jsonify
 from slack_bolt import App
 from slack_bolt.adapter.flask import SlackRequestHandler
-from openai import OpenAI
+from slack_sdk.signature import SignatureVerifier
 from dotenv import load_dotenv
 
-# 👉 Import internal analysis pipeline
-from engine.pipeline import run_pipeline
+from utils import llm, instrument, deadline
+from utils.cache import DiskCache
+from utils.dispatch import POOL, DISPATCH_MODE
+from utils.slack_stream import SlackStreamer
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# 👉 Internal analysis pipeline, imported on first use: it pulls in pandas, Drive and Notion
+def run_pipeline(*args, **kwargs):
+    from engine.pipeline import run_pipeline as _run_pipeline
+    return _run_pipeline(*args, **kwargs)
+
+
+def quick_answer(*args, **kwargs):
+    from engine.pipeline import quick_answer as _quick_answer
+    return _quick_answer(*args, **kwargs)
+
+
+def follow_up_question(*args, **kwargs):
+    from engine.pipeline import follow_up_question as _follow_up_question
+    return _follow_up_question(*args, **kwargs)
+
+
+# Warm those imports in the background so Slack's url_verification is answered right after boot
+if os.getenv("DEXTER_PRELOAD", "1") == "1":
+    threading.Thread(target=lambda: __import__("engine.pipeline"), name="dexter-preload", daemon=True).start()
+
+# Seconds a whole answer (pipeline + final GPT call) may take before we give up
+REQUEST_DEADLINE = float(os.getenv("DEXTER_REQUEST_DEADLINE", 90))
+
+# Stream answers into Slack as they're generated (needs the thread pool or inline dispatch)
+STREAM_RESPONSES = os.getenv("DEXTER_STREAM", "1") == "1"
 
 # Slack + Flask setup
+# auth.test at boot is an extra network round-trip on every cold start; the token gets used soon enough
 slack_app = App(
     token=os.getenv("SLACK_BOT_TOKEN"),
-    signing_secret=os.getenv("SLACK_SIGNING_SECRET")
+    signing_secret=os.getenv("SLACK_SIGNING_SECRET"),
+    token_verification_enabled=os.getenv("SLACK_VERIFY_TOKEN_AT_BOOT") == "1"
 )
+# Optional Web API override, e.g. a local Slack stand-in for benchmarks
+if os.getenv("SLACK_API_URL"):
+    slack_app.client.base_url = os.getenv("SLACK_API_URL")
 flask_app = Flask(__name__)
 handler = SlackRequestHandler(slack_app)
 
+# Slack redelivers events it thinks we missed; remember event ids (across workers) so each runs once
+SLACK_EVENT_TTL = int(os.getenv("SLACK_EVENT_TTL", 3600))
+SLACK_EVENT_MAX = int(os.getenv("SLACK_EVENT_MAX", 50000))
+SEEN_EVENTS = DiskCache("slack_events", ttl=SLACK_EVENT_TTL, max_entries=SLACK_EVENT_MAX)
+signature_verifier = SignatureVerifier(os.getenv("SLACK_SIGNING_SECRET") or "")
+
 
 # 💡 GPT-4 response generator with internal pipeline context
-def generate_response(user_prompt):
+def generate_response(user_prompt, on_metrics=None, on_delta=None, user_id=None):
+    """
+    on_metrics(block) gets the Key Metrics block as soon as it's computed;
+    on_delta(text_so_far) turns on streaming for the final GPT call.
+    user_id lets a follow-up question reuse the client from the user's last one.
+    """
     try:
-        # Always pull context from internal pipeline (even if minimal)
-        context = run_pipeline(user_prompt)
-
-        # Merge prompt + internal analysis (fallback if no data found)
-        full_prompt = (
-            f"User question: {user_prompt}\n\n"
-            f"Internal context:\n{context if context else '[No specific data found, use trends and analysis]'}"
-        )
-
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are Dexter, an AI growth assistant created by Winning Creative. "
-                        "You're analytical, strategic, and speak confidently about marketing data and performance trends. "
-                        "You respond based on a mix of internal campaign data, marketing strategy best practices, and observed trends. "
-                        "Even when specific data isn't available, you provide sharp insight using your expertise."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": full_prompt
-                }
-            ]
-        )
-        return response.choices[0].message.content.strip()
-
+        with deadline.deadline(REQUEST_DEADLINE):
+            return _generate_response(user_prompt, on_metrics, on_delta, user_id)
+    except deadline.DeadlineExceeded:
+        return "⏳ Sorry, that took longer than it should have. Please try again in a moment."
     except Exception as e:
         return f"⚠️ Error generating response: {str(e)}"
 
 
+def _generate_response(user_prompt, on_metrics, on_delta, user_id):
+    # "more" after a quick numbers answer asks for the full analysis of that question;
+    # otherwise purely numeric questions are answered from the metrics without any GPT call
+    previous = follow_up_question(user_prompt, user_id)
+    if previous:
+        user_prompt = previous
+    else:
+        quick = quick_answer(user_prompt, user_id)
+        if quick:
+            return quick
+
+    # Always pull context from internal pipeline (even if minimal). The final GPT call runs as the
+    # pipeline's finish step, so a cached answer comes back without any GPT call at all.
+    return run_pipeline(user_prompt, user_id=user_id, on_metrics=on_metrics,
+                        finish=lambda context: _final_answer(user_prompt, context, on_delta))
+
+
+def _final_answer(user_prompt, context, on_delta):
+    # Merge prompt + internal analysis (fallback if no data found)
+    full_prompt = (
+        f"User question: {user_prompt}\n\n"
+        f"Internal context:\n{context if context else '[No specific data found, use trends and analysis]'}"
+    )
+
+    response = llm.chat(
+        "answer",
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are Dexter, an AI growth assistant created by Winning Creative. "
+                    "You're analytical, strategic, and speak confidently about marketing data and performance trends. "
+                    "You respond based on a mix of internal campaign data, marketing strategy best practices, and observed trends. "
+                    "Even when specific data isn't available, you provide sharp insight using your expertise."
+                )
+            },
+            {
+                "role": "user",
+                "content": full_prompt
+            }
+        ],
+        stream=on_delta is not None
+    )
+    if on_delta is None:
+        return response.choices[0].message.content.strip()
+
+    text = ""
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            text += chunk.choices[0].delta.content
+            on_delta(text)
+    return text.strip()
+
+
+# 📡 Key Metrics, then the answer as it streams in, into the placeholder the streamer already posted
+def stream_response(user_prompt, streamer, user_id=None):
+    answer = generate_response(user_prompt, on_metrics=streamer.set_header, on_delta=streamer.push,
+                               user_id=user_id)
+    streamer.finish(answer)
+
+
 # 📩 Respond to Slack DMs
 @slack_app.event("message")
 def handle_message(event, say):
     channel_type = event.get("channel_type")
     text = event.get("text")
+    user_id = event.get("user")
 
     if channel_type == "im" and not event.get("bot_id"):
-        gpt_response = generate_response(text)
-        say(gpt_response)
+        # Process workers can't hold a Slack client, so streaming needs threads or inline mode
+        streaming = STREAM_RESPONSES and POOL.kind == "thread"
+
+        # Placeholder right away, before the job waits for a worker; the job edits it in place
+        streamer = SlackStreamer(say, slack_app.client)
+        streamer.start()
+
+        if DISPATCH_MODE == "inline":
+            if streaming:
+                stream_response(text, streamer, user_id)
+            else:
+                streamer.finish(generate_response(text, user_id=user_id))
+            return
+
+        # Ack right away; the answer is posted from the worker pool when ready
+        on_error = lambda e: streamer.finish(f"⚠️ Error generating response: {str(e)}")
+        if streaming:
+            accepted = POOL.submit(stream_response, text, streamer, user_id, on_error=on_error)
+        else:
+            accepted = POOL.submit(
+                generate_response, text, None, None, user_id,
+                on_done=streamer.finish,
+                on_error=on_error
+            )
+        if not accepted:
+            streamer.finish("⏳ I'm handling a lot of questions right now — please try again in a minute.")
 
 
 # 🌐 Slack Event Adapter
@@ -81,10 +185,55 @@ def slack_events():
     if payload.get("type") == "url_verification":
         return jsonify({"challenge": payload["challenge"]})
 
-    return handler.handle(request)
+    # Ack redeliveries of an event we've already taken without running it again.
+    # Only signed requests may claim an event id; anything else goes to Bolt, which rejects it.
+    event_id = payload.get("event_id")
+    if event_id and signature_verifier.is_valid_request(request.get_data(), dict(request.headers)):
+        retry_num = request.headers.get("X-Slack-Retry-Num")
+        if not SEEN_EVENTS.add(event_id, {"retry_num": retry_num}):
+            reason = request.headers.get("X-Slack-Retry-Reason") or "none"
+            instrument.incr("dexter_slack_duplicate_events_total", reason=reason)
+            print(f"🔁 Dropping duplicate Slack event {event_id} (retry {retry_num}, {reason})")
+            return Response("", status=200, headers={"X-Slack-No-Retry": "1"})
+
+    response = handler.handle(request)
+    if event_id and response.status_code >= 500:
+        # We never took the event, so let Slack's retry through
+        SEEN_EVENTS.invalidate(event_id)
+    return response
+
+
+# 📈 Worker pool counters (queue depth, wait times) for sizing the pool.
+# These are this worker's; /metrics has every worker's as dexter_dispatch{worker="<pid>"}.
+@flask_app.route("/dispatch/stats", methods=["GET"])
+def dispatch_stats():
+    return jsonify({"worker": os.getpid(), **POOL.stats()})
+
+
+instrument.register_gauge(
+    "dexter_dispatch",
+    lambda: {(("stat", k),): v for k, v in POOL.stats().items() if isinstance(v, (int, float))}
+)
+
+
+# 📊 Prometheus scrape endpoint: per-stage latency histograms, token usage, cache hit/miss.
+# Each gunicorn worker publishes its own metrics to DEXTER_METRICS_DIR, so whichever worker takes
+# the scrape returns all of them, labelled worker="<pid>" (sum by the other labels in queries).
+instrument.start_publisher()
+
+
+@flask_app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(instrument.render_all_workers(), mimetype="text/plain; version=0.0.4")
+
+
+# 🔥 Optional in-process cache warm-up (or run `python -m engine.warmup` as a separate worker)
+if os.getenv("DEXTER_WARMUP") == "1":
+    from engine.warmup import WarmupScheduler
+    WarmupScheduler().start()
 
 
-# 🚀 Run the Flask app
+# 🚀 Run the Flask app (development server; production runs `gunicorn -c gunicorn.conf.py app:flask_app`)
 if __name__ == "__main__":
     print("✅ Flask server running at http://localhost:3000")
     port = int(os.environ.get("PORT", 3000))
@@ -0,0 +1,456 @@
+# File: bench/fakes.py
+#
+# Local stand-ins for OpenAI, Notion, Google Drive and the Slack Web API, served
+# from one threaded HTTP server. Each service gets its own latency / error-rate /
+# payload-size profile so the pipeline can be load-tested without any network.
+
+import io
+import json
+import time
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class Profile:
+    """
+    Latency (ms, mean ± jitter), error rate (0..1) and payload size for one fake service.
+    `size` is words per OpenAI completion, results per Notion query page, or rows per
+    Drive CSV export (None keeps the service's default; Slack ignores it).
+    """
+
+    def __init__(self, latency_ms=50, jitter_ms=10, error_rate=0.0, size=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.size = size
+
+    def delay(self, fraction=1.0):
+        """Sleeps one sampled latency, or `fraction` of one (e.g. per streamed chunk)."""
+        ms = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) * fraction
+        time.sleep(ms / 1000)
+
+    def fails(self):
+        return random.random() < self.error_rate
+
+
+# Each streamed OpenAI chunk waits this fraction of a sampled latency (~10ms at 800ms)
+STREAM_CHUNK_FRACTION = 0.0125
+
+INDUSTRIES = ["roofing", "dental", "legal", "hvac", "real estate", "fitness"]
+
+
+def _drive_time(when):
+    return when.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class FakeWorld:
+    """
+    The data behind the fakes: N clients, each with current + previous Ads/GA exports.
+    Drive edits made with add_file / rename_file / trash_file / delete_file return the
+    matching changes-feed entry; publish_changes(page, page, ...) makes them visible to
+    changes.list, one scripted page per argument, in order.
+    """
+
+    def __init__(self, clients=20, rows=200, seed=7):
+        now = datetime.now(timezone.utc)
+        self.rows = rows
+        self.seed = seed
+        self.clients = []
+        self.files = {}  # id -> metadata
+        self.csv = {}  # id -> bytes, for files added with explicit contents
+        self._exports = {}  # id -> "ads" / "ga", generated on demand at any row count
+        self._generated = {}  # (id, rows) -> bytes
+        self._csv_lock = threading.Lock()
+        self.change_pages = []  # page token "i" -> change_pages[i]
+
+        for i in range(clients):
+            slug = f"client{i:04d}"
+            self.clients.append({
+                "name": f"Client {i:04d}",
+                "slug": slug,
+                "industry": INDUSTRIES[i % len(INDUSTRIES)],
+                "benchmark_cpl": 50 + 10 * (i % 20),
+            })
+            for kind in ("ads", "ga"):
+                for age_days, tag in ((1, "cur"), (8, "prev")):
+                    file_id = f"{slug}-{kind}-{tag}"
+                    self.files[file_id] = {
+                        "id": file_id,
+                        "name": f"{slug}_{kind}_{tag}.csv",
+                        "mimeType": "text/csv",
+                        "modifiedTime": _drive_time(now - timedelta(days=age_days)),
+                    }
+                    self._exports[file_id] = kind
+
+    def export(self, file_id, rows=None):
+        """A file's CSV bytes; generated exports have `rows` rows (default: the world's)."""
+        if file_id in self.csv:
+            return self.csv[file_id]
+        key = (file_id, rows or self.rows)
+        with self._csv_lock:
+            if key not in self._generated:
+                rng = random.Random(f"{self.seed}:{file_id}")
+                self._generated[key] = self._make_csv(self._exports[file_id], key[1], rng)
+            return self._generated[key]
+
+    @staticmethod
+    def _make_csv(kind, rows, rng):
+        out = io.StringIO()
+        # Two title lines, like real exports (download_csv skips them)
+        out.write("Report\nAll time\n")
+        if kind == "ads":
+            out.write("Campaign,Cost,Clicks,Conversions,Conv. rate\n")
+            for r in range(rows):
+                clicks = rng.randint(0, 300)
+                conversions = sum(rng.random() < 0.04 for _ in range(min(clicks, 50)))
+                rate = conversions / clicks * 100 if clicks else 0.0
+                out.write(f"Campaign {r % 25},\"${rng.uniform(5, 400):,.2f}\",{clicks},{conversions},{rate:.2f}%\n")
+        else:
+            out.write("Date,Active users\n")
+            for r in range(rows):
+                out.write(f"2025-06-{(r % 28) + 1:02d},\"{rng.randint(10, 3000):,}\"\n")
+        return out.getvalue().encode()
+
+    # ---- Drive ----
+
+    def list_files(self, q=""):
+        files = [f for f in self.files.values() if not f.get("trashed")]
+        if "name contains '" in q:
+            needle = q.split("name contains '")[1].split("'")[0]
+            files = [f for f in files if needle in f["name"]]
+        return sorted(files, key=lambda f: f["modifiedTime"], reverse=True)
+
+    def start_page_token(self):
+        return str(len(self.change_pages))
+
+    def changes_page(self, token):
+        """One changes.list response: nextPageToken while scripted pages remain, then newStartPageToken."""
+        i = int(token)
+        if i >= len(self.change_pages):
+            return {"changes": [], "newStartPageToken": self.start_page_token()}
+        page = {"changes": self.change_pages[i]}
+        if i + 1 < len(self.change_pages):
+            page["nextPageToken"] = str(i + 1)
+        else:
+            page["newStartPageToken"] = self.start_page_token()
+        return page
+
+    def publish_changes(self, *pages):
+        self.change_pages.extend(list(page) for page in pages)
+
+    def add_file(self, file_id, name, modified=None, data=b"Report\nAll time\n"):
+        self.files[file_id] = {
+            "id": file_id, "name": name, "mimeType": "text/csv",
+            "modifiedTime": _drive_time(modified or datetime.now(timezone.utc)),
+        }
+        self.csv[file_id] = data
+        return {"fileId": file_id, "removed": False, "file": dict(self.files[file_id])}
+
+    def rename_file(self, file_id, name):
+        self.files[file_id]["name"] = name
+        return {"fileId": file_id, "removed": False, "file": dict(self.files[file_id])}
+
+    def trash_file(self, file_id):
+        self.files[file_id]["trashed"] = True
+        return {"fileId": file_id, "removed": False, "file": dict(self.files[file_id])}
+
+    def delete_file(self, file_id):
+        self.files.pop(file_id, None)
+        self.csv.pop(file_id, None)
+        self._exports.pop(file_id, None)
+        return {"fileId": file_id, "removed": True}
+
+    # ---- Notion ----
+
+    def notion_page(self, client):
+        return {
+            "id": client["slug"],
+            "properties": {
+                "Client": {"type": "title", "title": [{"plain_text": client["name"]}]},
+                "Slug": {"type": "rich_text", "rich_text": [{"plain_text": client["slug"]}]},
+                "Industry": {"type": "select", "select": {"name": client["industry"]}},
+                "Benchmark CPL": {"type": "number", "number": client["benchmark_cpl"]},
+            },
+        }
+
+
+class _Request:
+    def __init__(self, service, fn):
+        self._service = service
+        self._fn = fn
+
+    def execute(self):
+        self._service.requests += 1
+        return self._fn()
+
+
+class FakeDriveService:
+    """
+    In-process stand-in for a googleapiclient Drive v3 service over a FakeWorld
+    (files.list, changes.getStartPageToken, changes.list), for tests that don't need HTTP.
+    `requests` counts executed calls.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.requests = 0
+
+    def files(self):
+        service = self
+
+        class Files:
+            def list(self, q="", **_):
+                return _Request(service, lambda: {"files": service.world.list_files(q)})
+        return Files()
+
+    def changes(self):
+        service = self
+
+        class Changes:
+            def getStartPageToken(self):
+                return _Request(service, lambda: {"startPageToken": service.world.start_page_token()})
+
+            def list(self, pageToken, **_):
+                return _Request(service, lambda: service.world.changes_page(pageToken))
+        return Changes()
+
+
+class FakeServices:
+    """
+    Starts the fake server on a free local port. Routes:
+      /v1/chat/completions          OpenAI (incl. streaming)
+      /notion/v1/databases/*/query  Notion
+      /drive/v3/...                 Google Drive (files, media, changes)
+      /slack/api/<method>           Slack Web API (records every message)
+    """
+
+    def __init__(self, world=None, openai=None, notion=None, drive=None, slack=None):
+        self.world = world or FakeWorld()
+        self.profiles = {
+            "openai": openai or Profile(latency_ms=800, jitter_ms=200),
+            "notion": notion or Profile(latency_ms=150, jitter_ms=40),
+            "drive": drive or Profile(latency_ms=120, jitter_ms=30),
+            "slack": slack or Profile(latency_ms=40, jitter_ms=10),
+        }
+        self.requests = {name: 0 for name in self.profiles}
+        self.slack_messages = {}  # channel -> [(monotonic time, text), ...]
+        self._lock = threading.Lock()
+        self._server = None
+
+    # ---- lifecycle ----
+
+    def start(self):
+        services = self
+
+        class Handler(_Handler):
+            fakes = services
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="bench-fakes", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def env(self):
+        """Environment variables that point the app at these fakes."""
+        return {
+            "OPENAI_API_KEY": "sk-fake",
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "NOTION_API_KEY": "secret-fake",
+            "NOTION_DB_ID": "fake-db",
+            "NOTION_API_URL": f"{self.url}/notion/v1",
+            "DRIVE_API_ENDPOINT": f"{self.url}/drive/v3/",
+            "SLACK_API_URL": f"{self.url}/slack/api/",
+            "SLACK_BOT_TOKEN": "xoxb-fake",
+            "SLACK_SIGNING_SECRET": "fake-signing-secret",
+        }
+
+    def count(self, service):
+        with self._lock:
+            self.requests[service] += 1
+
+    def record_slack(self, channel, text):
+        with self._lock:
+            self.slack_messages.setdefault(channel, []).append((time.monotonic(), text))
+
+    def completion_text(self, prompt):
+        if "Only respond with valid JSON" in prompt:
+            return json.dumps({"intent": "performance_review", "entities": ["google ads"], "slug": "general"})
+        words = ["growth", "leads", "campaign", "budget", "search", "intent", "landing", "page", "conversion"]
+        count = self.profiles["openai"].size or 60
+        return " ".join(random.choice(words) for _ in range(count)).capitalize() + "."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fakes = None
+
+    def log_message(self, *args):
+        pass
+
+    # ---- helpers ----
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, payload, content_type="application/json"):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _gate(self, service):
+        """Applies the service profile; returns False (after replying with an error) on an injected failure."""
+        self.fakes.count(service)
+        profile = self.fakes.profiles[service]
+        profile.delay()
+        if profile.fails():
+            status = 429 if service == "openai" else 503
+            self._send(status, {"error": {"message": "injected failure", "type": "fake"}})
+            return False
+        return True
+
+    # ---- routing ----
+
+    def do_GET(self):
+        path = urlparse(self.path)
+        if path.path.startswith("/drive/v3/"):
+            if self._gate("drive"):
+                self._drive(path.path[len("/drive/v3/"):], parse_qs(path.query))
+            return
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self._body()
+        path = urlparse(self.path).path
+        if path == "/v1/chat/completions":
+            if self._gate("openai"):
+                self._openai(json.loads(body or b"{}"))
+        elif path.startswith("/notion/v1/databases/"):
+            if self._gate("notion"):
+                self._notion(json.loads(body or b"{}"))
+        elif path.startswith("/slack/api/"):
+            if self._gate("slack"):
+                self._slack(path[len("/slack/api/"):], body)
+        else:
+            self._send(404, {"error": "not found"})
+
+    # ---- services ----
+
+    def _openai(self, request):
+        prompt = " ".join(m.get("content", "") for m in request.get("messages", []))
+        text = self.fakes.completion_text(prompt)
+        model = request.get("model", "gpt-4")
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                 "total_tokens": (len(prompt) + len(text)) // 4}
+
+        if not request.get("stream"):
+            self._send(200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            # Inter-token gap, on top of the time to first token from _gate
+            self.fakes.profiles["openai"].delay(fraction=STREAM_CHUNK_FRACTION)
+        final = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": model, "choices": [], "usage": usage}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+        self.wfile.flush()
+
+    def _notion(self, request):
+        world = self.fakes.world
+        slug_filter = request.get("filter", {}).get("rich_text", {}).get("equals")
+        if slug_filter is not None:
+            pages = [world.notion_page(c) for c in world.clients if c["slug"] == slug_filter]
+            self._send(200, {"results": pages, "has_more": False, "next_cursor": None})
+            return
+
+        page_size = self.fakes.profiles["notion"].size or 100
+        start = int(request.get("start_cursor") or 0)
+        clients = world.clients[start:start + page_size]
+        more = start + page_size < len(world.clients)
+        self._send(200, {
+            "results": [world.notion_page(c) for c in clients],
+            "has_more": more,
+            "next_cursor": str(start + page_size) if more else None,
+        })
+
+    def _drive(self, route, query):
+        world = self.fakes.world
+        if route == "changes/startPageToken":
+            self._send(200, {"startPageToken": world.start_page_token()})
+        elif route == "changes":
+            self._send(200, world.changes_page(query.get("pageToken", ["0"])[0]))
+        elif route == "files":
+            self._send(200, {"files": world.list_files(query.get("q", [""])[0])})
+        elif route.startswith("files/"):
+            file_id = route[len("files/"):]
+            if file_id not in world.files:
+                self._send(404, {"error": {"message": "file not found"}})
+            elif query.get("alt", [""])[0] == "media":
+                self._media(world.export(file_id, rows=self.fakes.profiles["drive"].size))
+            else:
+                self._send(200, world.files[file_id])
+        else:
+            self._send(404, {"error": "not found"})
+
+    def _media(self, data):
+        # Honors "Range: bytes=a-b" like Drive does, so chunked downloads get 206 + Content-Range
+        ranged = self.headers.get("Range", "")
+        if not ranged.startswith("bytes="):
+            self._send(200, data, content_type="text/csv")
+            return
+        first, _, last = ranged[len("bytes="):].partition("-")
+        first, last = int(first), min(int(last or len(data) - 1), len(data) - 1)
+        part = data[first:last + 1]
+        self.send_response(206)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(part)))
+        self.send_header("Content-Range", f"bytes {first}-{last}/{len(data)}")
+        self.end_headers()
+        self.wfile.write(part)
+
+    def _slack(self, method, body):
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            params = json.loads(body or b"{}")
+        else:
+            params = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+
+        if method in ("chat.postMessage", "chat.update"):
+            channel = params.get("channel", "")
+            self.fakes.record_slack(channel, params.get("text", ""))
+            self._send(200, {"ok": True, "channel": channel, "ts": params.get("ts") or f"{time.time():.6f}"})
+        elif method == "auth.test":
+            self._send(200, {"ok": True, "user_id": "UFAKEBOT", "bot_id": "BFAKE", "team_id": "TFAKE",
+                             "user": "dexter", "team": "fake"})
+        else:
+            self._send(200, {"ok": True})
@@ -0,0 +1,195 @@
+# File: bench/load.py
+#
+# Offline end-to-end load benchmark. Runs run_pipeline (or the /slack/events route)
+# against the local fakes in bench/fakes.py at increasing concurrency and reports
+# throughput plus p50/p95/p99 per stage.
+#
+#   python -m bench.load --mode pipeline --concurrency 1,4,16 --requests 32
+#   python -m bench.load --mode slack --openai-ms 800 --error-rate 0.02 --rows 5000
+
+import os
+import sys
+import hmac
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fakes import FakeServices, FakeWorld, Profile
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline Dexter load benchmark")
+    parser.add_argument("--mode", choices=["pipeline", "slack"], default="pipeline")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=32, help="requests per level")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=500, help="rows per fake CSV export")
+    parser.add_argument("--notion-page-size", type=int, default=100, help="results per Notion query page")
+    parser.add_argument("--openai-ms", type=float, default=800)
+    parser.add_argument("--notion-ms", type=float, default=150)
+    parser.add_argument("--drive-ms", type=float, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="applied to every fake service")
+    parser.add_argument("--completion-words", type=int, default=60)
+    parser.add_argument("--cold", action="store_true", help="clear local caches before each level")
+    return parser.parse_args()
+
+
+def pct(values, p):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def clear_caches():
+    from engine import math, trends
+    from utils import drive_utils
+    trends.invalidate_trends()
+    with math._memo_lock:
+        math._memo.clear()
+    shutil.rmtree(drive_utils.FRAME_CACHE.directory, ignore_errors=True)
+    os.makedirs(drive_utils.FRAME_CACHE.directory, exist_ok=True)
+
+
+def report(level, wall, latencies, errors, extra=None):
+    from utils import instrument
+    ok = len(latencies)
+    print(f"\n=== concurrency {level}: {ok} ok, {errors} failed in {wall:.2f}s "
+          f"→ {ok / wall:.2f} req/s ===")
+    if latencies:
+        print(f"  end-to-end   p50 {pct(latencies, .5):7.3f}s  p95 {pct(latencies, .95):7.3f}s  "
+              f"p99 {pct(latencies, .99):7.3f}s")
+    for name, values in (extra or {}).items():
+        print(f"  {name:<12} p50 {pct(values, .5):7.3f}s  p95 {pct(values, .95):7.3f}s  p99 {pct(values, .99):7.3f}s")
+    for name, stats in sorted(instrument.snapshot().items()):
+        print(f"  {name:<22} n={stats['count']:<5} p50 {stats['p50']:7.3f}s  p95 {stats['p95']:7.3f}s  "
+              f"p99 {stats['p99']:7.3f}s")
+
+
+def run_pipeline_level(world, level, requests):
+    from engine.pipeline import run_pipeline
+    questions = [f"How is {random.choice(world.clients)['name']} doing this week?" for _ in range(requests)]
+    latencies, errors = [], 0
+
+    def one(question):
+        start = time.perf_counter()
+        run_pipeline(question)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=level) as executor:
+        futures = [executor.submit(one, q) for q in questions]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                print("⚠️ request failed:", str(e))
+    return time.perf_counter() - start, latencies, errors, {}
+
+
+def _signed_event(secret, event_id, channel, text):
+    body = json.dumps({
+        "type": "event_callback",
+        "team_id": "TFAKE",
+        "api_app_id": "AFAKE",
+        "event_id": event_id,
+        "event_time": int(time.time()),
+        "event": {"type": "message", "channel_type": "im", "channel": channel, "user": "UBENCH",
+                  "text": text, "ts": f"{time.time():.6f}"},
+    })
+    timestamp = str(int(time.time()))
+    signature = "v0=" + hmac.new(secret.encode(), f"v0:{timestamp}:{body}".encode(), hashlib.sha256).hexdigest()
+    headers = {"Content-Type": "application/json", "X-Slack-Request-Timestamp": timestamp,
+               "X-Slack-Signature": signature}
+    return body, headers
+
+
+def run_slack_level(fakes, level, requests, round_id, timeout=600):
+    import app
+    from utils.slack_stream import PLACEHOLDER
+    world = fakes.world
+    secret = os.environ["SLACK_SIGNING_SECRET"]
+    jobs = [(f"Ev{round_id}x{i}", f"D{round_id}x{i}",
+             f"How is {random.choice(world.clients)['name']} doing this week?") for i in range(requests)]
+    sent_at, acks = {}, []
+
+    def post(job):
+        event_id, channel, text = job
+        body, headers = _signed_event(secret, event_id, channel, text)
+        client = app.flask_app.test_client()
+        start = time.perf_counter()
+        sent_at[channel] = time.monotonic()
+        response = client.post("/slack/events", data=body, headers=headers)
+        acks.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"/slack/events returned {response.status_code}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=level) as executor:
+        list(executor.map(post, jobs))
+
+    # Wait for every conversation to receive its final (non-placeholder, non-streaming) message
+    def final_time(channel):
+        for at, text in reversed(fakes.slack_messages.get(channel, [])):
+            if text != PLACEHOLDER and not text.endswith("▌"):
+                return at
+        return None
+
+    deadline = time.monotonic() + timeout
+    pending = {channel for _, channel, _ in jobs}
+    latencies, first_message = [], []
+    while pending and time.monotonic() < deadline:
+        for channel in list(pending):
+            done_at = final_time(channel)
+            if done_at is not None:
+                pending.discard(channel)
+                latencies.append(done_at - sent_at[channel])
+                first_message.append(fakes.slack_messages[channel][0][0] - sent_at[channel])
+        time.sleep(0.05)
+
+    return time.perf_counter() - start, latencies, len(pending), {"ack": acks, "first_msg": first_message}
+
+
+def main():
+    args = parse_args()
+    world = FakeWorld(clients=args.clients, rows=args.rows)
+    fakes = FakeServices(
+        world,
+        openai=Profile(args.openai_ms, args.openai_ms / 4, args.error_rate, size=args.completion_words),
+        notion=Profile(args.notion_ms, args.notion_ms / 4, args.error_rate, size=args.notion_page_size),
+        drive=Profile(args.drive_ms, args.drive_ms / 4, args.error_rate, size=args.rows),
+        slack=Profile(40, 10, 0.0),
+    ).start()
+
+    # Everything reads its configuration at import time, so set the environment first
+    cache_dir = tempfile.mkdtemp(prefix="dexter-bench-")
+    os.environ.update(fakes.env())
+    os.environ.update({"DEXTER_CACHE_DIR": cache_dir, "DEXTER_PRELOAD": "0", "DEXTER_WARMUP": "0"})
+    from utils import instrument
+
+    print(f"🧪 Fakes at {fakes.url}; {args.clients} clients × {args.rows} rows; cache dir {cache_dir}")
+    try:
+        for round_id, level in enumerate(int(c) for c in args.concurrency.split(",")):
+            if args.cold:
+                clear_caches()
+            instrument.reset()
+            if args.mode == "pipeline":
+                result = run_pipeline_level(world, level, args.requests)
+            else:
+                result = run_slack_level(fakes, level, args.requests, round_id)
+            wall, latencies, errors, extra = result
+            report(level, wall, latencies, errors, extra)
+        print(f"\n📨 Fake service requests: {fakes.requests}")
+    finally:
+        fakes.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# File: bench/math_engine.py
+#
+# Benchmark: engine.math on large Google Ads exports (string-typed, as read from CSV).
+# Run with: python -m bench.math_engine [rows]
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+from engine import math
+
+
+def make_ads_export(rows, campaigns=500, seed=7):
+    rng = np.random.default_rng(seed)
+    cost = rng.gamma(2.0, 40.0, rows)
+    clicks = rng.integers(0, 400, rows)
+    conversions = rng.binomial(clicks, 0.04)
+    rate = np.divide(conversions, clicks, out=np.zeros(rows), where=clicks > 0) * 100
+    return pd.DataFrame({
+        "Campaign": pd.Series(rng.integers(0, campaigns, rows)).map(lambda i: f"Campaign {i}"),
+        "Cost": [f"${c:,.2f}" for c in cost],
+        "Clicks": clicks.astype(str),
+        "Conversions": conversions.astype(str),
+        "Conv. rate": [f"{r:.2f}%" for r in rate],
+    })
+
+
+def legacy_totals(df):
+    # The pre-engine implementation: in-place parsing and an unweighted mean of rates
+    df = df.copy()
+    df["Cost"] = pd.to_numeric(df["Cost"], errors="coerce")
+    df["Conversions"] = pd.to_numeric(df["Conversions"], errors="coerce")
+    df["Conv. rate"] = pd.to_numeric(df["Conv. rate"].astype(str).str.replace('%', ''), errors="coerce")
+    return df["Cost"].sum(), df["Conversions"].sum(), df["Conv. rate"].mean()
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"⏱️ {label}: {(time.perf_counter() - start) * 1000:.0f} ms")
+    return result
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    current = make_ads_export(rows)
+    previous = make_ads_export(rows, seed=8)
+    print(f"📦 {rows:,} rows per period")
+
+    timed("legacy totals, 2 periods", lambda: (legacy_totals(current), legacy_totals(previous)))
+    per_campaign, totals = timed(
+        "calculate_periods, 2 periods, per-campaign + totals",
+        lambda: math.calculate_periods([current, previous]),
+    )
+    timed(
+        "calculate_periods, 4 periods",
+        lambda: math.calculate_periods([current, previous, current, previous]),
+    )
+    print(f"📊 {len(per_campaign)} campaign rows")
+    print(totals)
@@ -0,0 +1,56 @@
+# File: bench/slug_matcher.py
+#
+# Microbenchmark: old per-client loop vs. the Aho-Corasick slug index.
+# Run with: python -m bench.slug_matcher [num_clients]
+
+import sys
+import time
+import random
+import string
+from engine.slug_index import SlugIndex, normalize_string
+
+
+def make_clients(n, seed=7):
+    rng = random.Random(seed)
+    clients = []
+    for i in range(n):
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 3))]
+        name = " ".join(words)
+        clients.append({"name": name, "slug": f"{normalize_string(name)}{i}", "aliases": []})
+    return clients
+
+
+def linear_match(clients, text):
+    # The pre-index implementation of match_slug_from_text
+    norm_text = normalize_string(text)
+    for client in clients:
+        if normalize_string(client["name"]) in norm_text or normalize_string(client["slug"]) in norm_text:
+            return client
+    return None
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    clients = make_clients(n)
+    target = clients[-1]
+    questions = [
+        f"How is {target['name'].title()} doing on Google Ads this week?",
+        "What should we focus on for Q3 growth across paid social?",
+    ]
+
+    start = time.perf_counter()
+    index = SlugIndex(clients)
+    build = time.perf_counter() - start
+
+    print(f"📦 {n} clients, index built in {build * 1000:.1f} ms")
+    for q in questions:
+        old = timed(lambda: linear_match(clients, q), 5)
+        new = timed(lambda: index.match(q), 1000)
+        print(f"⏱️ {q[:50]!r}: linear {old * 1000:.2f} ms | index {new * 1e6:.1f} µs | {old / new:.0f}x")
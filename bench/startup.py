@@ -0,0 +1,43 @@
+# File: bench/startup.py
+#
+# Cold-start benchmark: fresh interpreter -> `import app` -> first url_verification answer.
+# Run with: python -m bench.startup [runs]
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.flask_app.test_client()
+response = client.post("/slack/events", json={"type": "url_verification", "challenge": "ping"})
+assert response.get_json() == {"challenge": "ping"}
+answered = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_response": answered - start}))
+"""
+
+
+def run_once():
+    env = dict(os.environ)
+    # Dummy credentials are enough: nothing may touch the network during boot
+    env.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+    env.setdefault("SLACK_SIGNING_SECRET", "bench")
+    env.setdefault("OPENAI_API_KEY", "sk-bench")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = [run_once() for _ in range(runs)]
+    for key in ("import", "first_response"):
+        values = [s[key] * 1000 for s in samples]
+        print(f"⏱️ {key}: median {statistics.median(values):.0f} ms, "
+              f"min {min(values):.0f} ms, max {max(values):.0f} ms ({runs} runs)")
@@ -0,0 +1,114 @@
+# File: engine/answer_cache.py
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from utils import instrument
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 512))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 24 * 3600))
+
+
+def normalize_question(question):
+    """Lowercase, punctuation stripped, whitespace collapsed — "How's X doing?" == "hows x doing"."""
+    return " ".join(re.sub(r"[^\w\s]", "", (question or "").lower()).split())
+
+
+def fingerprint(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class AnswerCache:
+    """
+    Bounded LRU of finished answers, keyed on slug + data version (Drive file
+    versions and Notion properties) + metrics fingerprint + intent + normalized question.
+    The first lookup that sees a new data version for a slug drops that slug's
+    older answers, so a new CSV or Notion edit invalidates them straight away.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, answer)
+        self._data_versions = {}  # slug -> current data version
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(slug, raw_data, metrics, question_context, question, kind="context"):
+        """kind keeps the pipeline's polished context apart from the final answer built on it."""
+        data_version = fingerprint([raw_data.get("versions"), raw_data.get("notion")])
+        key = (slug, data_version, fingerprint(metrics), question_context.get("intent"),
+               normalize_question(question), kind)
+        return key, data_version
+
+    def _sync_version(self, slug, data_version):
+        # Caller holds the lock
+        if self._data_versions.get(slug) == data_version:
+            return
+        if slug in self._data_versions:
+            stale = [k for k in self._entries if k[0] == slug]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += 1
+            print(f"♻️ New data for {slug}, dropped {len(stale)} cached answer(s)")
+        self._data_versions[slug] = data_version
+
+    def get(self, key, data_version):
+        now = time.time()
+        with self._lock:
+            self._sync_version(key[0], data_version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        instrument.cache_event("answers", entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key, data_version, answer):
+        with self._lock:
+            self._sync_version(key[0], data_version)
+            self._entries[key] = (time.time() + self.ttl, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, slug=None):
+        with self._lock:
+            if slug is None:
+                self._entries.clear()
+                self._data_versions.clear()
+                return
+            for k in [k for k in self._entries if k[0] == slug]:
+                del self._entries[k]
+            self._data_versions.pop(slug, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+ANSWERS = AnswerCache()
+
+instrument.register_gauge(
+    "dexter_answer_cache",
+    lambda: {(("stat", k),): v for k, v in ANSWERS.stats().items()}
+)
@@ -0,0 +1,79 @@
+# File: engine/dag.py
+
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Stage:
+    """
+    One step of the pipeline. `fn` is called with the results of `deps`
+    as positional arguments, in order, once all of them have finished.
+    """
+
+    def __init__(self, name, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+class Finish:
+    """Returned by a stage to end the run early with `value` as that stage's result."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def run(stages, max_workers=4):
+    """
+    Runs stages as soon as their dependencies are done, independent ones concurrently.
+    Returns (results, timings) where timings maps stage name -> seconds.
+    The first stage error cancels anything not yet started and is re-raised.
+    A stage returning Finish(value) does the same without an error: stages not
+    yet started are skipped and stages still running are left to finish unobserved.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Stage `{stage.name}` depends on unknown stage(s): {missing}")
+
+    results = {}
+    timings = {}
+    pending = dict(by_name)
+    running = {}
+
+    def _timed(stage, args):
+        start = time.perf_counter()
+        try:
+            return stage.fn(*args)
+        finally:
+            timings[stage.name] = time.perf_counter() - start
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dexter-stage")
+    try:
+        while pending or running:
+            ready = [s for s in pending.values() if all(d in results for d in s.deps)]
+            for stage in ready:
+                del pending[stage.name]
+                args = [results[d] for d in stage.deps]
+                # Copy the caller's context so context-local state follows the stage thread
+                ctx = contextvars.copy_context()
+                running[executor.submit(ctx.run, _timed, stage, args)] = stage.name
+
+            if not running:
+                raise ValueError(f"Stage graph has a cycle: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                if isinstance(result, Finish):
+                    results[name] = result.value
+                    return results, dict(timings)
+                results[name] = result
+    finally:
+        # Don't block on stages still running after a failure
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, timings
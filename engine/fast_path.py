@@ -0,0 +1,116 @@
+# File: engine/fast_path.py
+#
+# Purely quantitative questions ("what was X's CPL last week?") are answered straight
+# from the computed metrics, with no LLM calls. The full narrative is a follow-up away.
+
+import re
+from .polish import key_metrics
+
+# metric key -> pattern for the ways people ask for it
+METRIC_PATTERNS = {
+    "cpl": r"\b(cpl|cpa|cost per (lead|conversion|acquisition))\b",
+    "conversion_rate": r"\b(conv\.?|conversion) rate\b",
+    "total_conversions": r"\b(conversions?|leads?)\b(?! rate)",
+    "total_cost": r"\b(ad ?spend|spend|spent|cost|budget used)\b",
+    "ga_users": r"\b(users|traffic|visitors|sessions)\b",
+}
+# "numbers", "stats", "key metrics" ... ask for the whole block
+ALL_METRICS = r"\b(numbers|stats|metrics|kpis?)\b"
+
+# Phrasings that ask for a value rather than an opinion
+QUANTITATIVE = (
+    r"^\s*(what('?s| is| was| are| were)|how (much|many)|show( me)?|give me|tell me|"
+    r"pull( up)?|get( me)?|list|current|latest)\b"
+)
+# Periods the latest weekly export actually covers. Anything else ("in March", "this month",
+# "last year", "ytd", "2024") is left in the question, so it falls through to the full pipeline.
+TIME_PHRASES = (
+    r"\b((this|last|past|current) (week|period)|right now|currently)\b"
+)
+# Words a bare lookup is made of once the client, metric and period are taken out.
+# Anything else ("best way to lower", "going on with", "drop in", "trend") needs the full pipeline.
+LOOKUP_WORDS = {
+    "what", "whats", "what's", "is", "was", "are", "were", "how", "much", "many", "show", "me",
+    "give", "tell", "pull", "up", "get", "got", "list", "current", "latest", "the", "our", "their",
+    "its", "his", "her", "for", "of", "on", "in", "at", "a", "an", "did", "do", "does", "we", "they",
+    "have", "has", "had", "total", "overall", "please", "and", "s", "key",
+}
+# Replies that ask for the full analysis of the previous quick answer
+FOLLOW_UP = r"^\s*(more|tell me more|full (analysis|breakdown|story)|go deeper|dig deeper|why\??|and why\??|details?)\W*$"
+
+_METRICS = {key: re.compile(pattern, re.IGNORECASE) for key, pattern in METRIC_PATTERNS.items()}
+_ALL = re.compile(ALL_METRICS, re.IGNORECASE)
+_QUANTITATIVE = re.compile(QUANTITATIVE, re.IGNORECASE)
+_TIME = re.compile(TIME_PHRASES, re.IGNORECASE)
+_FOLLOW_UP = re.compile(FOLLOW_UP, re.IGNORECASE)
+
+
+def _without(text, pattern):
+    return pattern.sub(" ", text)
+
+
+def requested_metrics(question, client_names=()):
+    """
+    The metric keys a purely quantitative question asks for, or None if it
+    needs the full pipeline. An empty list means "all of the key metrics".
+    `client_names` (name, slug, aliases) are taken out before checking that
+    nothing but a lookup phrase is left.
+    """
+    if not question:
+        return None
+    question = question.replace("\u2019", "'")  # Slack sends curly apostrophes
+    if not _QUANTITATIVE.search(question):
+        return None
+    wanted = []
+    text = question
+    for key, pattern in _METRICS.items():
+        if pattern.search(text):
+            wanted.append(key)
+            # "cost per lead" is the CPL, not also spend and leads
+            text = _without(text, pattern)
+    if not wanted and not _ALL.search(question):
+        return None
+
+    text = _without(_without(text, _ALL), _TIME)
+    for name in client_names:
+        words = re.findall(r"[a-z0-9]+", (name or "").lower())
+        if words:
+            text = re.sub(r"\b" + r"\W*".join(words) + r"\b", " ", text, flags=re.IGNORECASE)
+    leftover = [w for w in re.findall(r"[a-z0-9']+", text.lower()) if w.strip("'") not in LOOKUP_WORDS]
+    return wanted if not leftover else None
+
+
+def is_follow_up(text):
+    return bool(text and _FOLLOW_UP.match(text))
+
+
+def _delta(value):
+    return f" ({value:+.1f}% vs. previous period)" if value is not None else ""
+
+
+def _money(value):
+    return f"${value:,.2f}" if value is not None else "N/A"
+
+
+def _line(key, metrics):
+    if key == "cpl":
+        return (f"CPL: {_money(metrics.get('cpl'))} vs. benchmark {_money(metrics.get('benchmark_cpl'))}"
+                f"{_delta(metrics.get('cpl_change'))}")
+    if key == "conversion_rate":
+        rate = metrics.get("conversion_rate")
+        return f"Conversion rate: {f'{rate:.2f}%' if rate is not None else 'N/A'}{_delta(metrics.get('conversion_rate_change'))}"
+    if key == "total_conversions":
+        conversions = metrics.get("total_conversions")
+        return f"Conversions: {int(conversions) if conversions is not None else 'N/A'}{_delta(metrics.get('lead_change'))}"
+    if key == "total_cost":
+        return f"Ad spend: {_money(metrics.get('total_cost'))}"
+    if key == "ga_users":
+        users = metrics.get("ga_users")
+        return f"GA users: {f'{int(users):,}' if users is not None else 'N/A'}{_delta(metrics.get('user_change'))}"
+
+
+def answer(slug, metrics, wanted):
+    """Direct answer for the requested metrics, then the Key Metrics block and the follow-up hint."""
+    lines = [f"*{slug}*: " + "; ".join(_line(key, metrics) for key in wanted), ""] if wanted else []
+    lines += [key_metrics(metrics), "", "_Reply *more* for the full analysis._"]
+    return "\n".join(lines)
@@ -0,0 +1,70 @@
+# File: engine/intent_rules.py
+
+import re
+
+# intent -> [(pattern, weight), ...]; a question scores the sum of the weights it matches
+INTENT_RULES = {
+    "performance_review": [
+        (r"\bhow('?s| is| are| did| has| have)\b.*\b(doing|going|perform\w*|look\w*|trend\w*)", 2.0),
+        (r"\b(performance|results?|report|recap|review|update|overview|summary)\b", 1.5),
+        (r"\b(this|last|past) (week|month|quarter|period)\b", 1.0),
+        (r"\b(cpl|cpa|ctr|roas|conversions?|leads?|conv\.? rate|conversion rate|spend|traffic|users)\b", 1.0),
+        (r"\b(up|down|better|worse|change[ds]?|compare\w*|vs\.?)\b", 0.5),
+    ],
+    "growth_strategy": [
+        (r"\b(grow|growth|scale|scaling|expand\w*)\b", 2.0),
+        (r"\b(strateg\w*|plan|roadmap|ideas?|next steps?|opportunit\w*)\b", 1.5),
+        (r"\bwhat (should|can|could) (we|they|i)\b", 1.0),
+        (r"\b(seo|content|email|social|brand\w*|campaign ideas?)\b", 0.5),
+    ],
+    "budget_optimization": [
+        (r"\b(budget|spend(ing)?|bids?|bidding|allocat\w*|cost[- ]?per|wast\w*)\b", 2.0),
+        (r"\b(optimi[sz]\w*|reduce|lower|cut|efficien\w*|roi|roas)\b", 1.5),
+        (r"\b(cpl|cpa|cpc)\b", 0.5),
+    ],
+    "channel_support": [
+        (r"\b(google ads|ppc|search ads|meta ads|facebook ads|display|youtube|lsa|local services)\b", 1.5),
+        (r"\b(support|help|need|fix|set ?up|audit)\b", 1.0),
+    ],
+    "troubleshooting": [
+        (r"\bwhy\b", 1.5),
+        (r"\b(drop\w*|declin\w*|fell|fall\w*|spik\w*|broken|issue|problem|wrong)\b", 1.5),
+    ],
+}
+
+ENTITY_TERMS = [
+    "google ads", "meta ads", "facebook ads", "ppc", "seo", "email", "social", "content",
+    "landing page", "cpl", "cpa", "ctr", "roas", "conversions", "leads", "conversion rate",
+    "budget", "traffic", "ga4", "analytics", "lsa", "youtube", "display",
+]
+
+_COMPILED = {
+    intent: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in rules]
+    for intent, rules in INTENT_RULES.items()
+}
+_ENTITY_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(t) for t in sorted(ENTITY_TERMS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+
+def classify(question: str):
+    """
+    Scores the question against each intent's rules.
+    Returns (intent, confidence, entities); confidence is the winner's share of
+    all matched weight, scaled down when very little matched at all.
+    """
+    scores = {
+        intent: sum(weight for pattern, weight in rules if pattern.search(question))
+        for intent, rules in _COMPILED.items()
+    }
+    total = sum(scores.values())
+    entities = sorted({m.lower() for m in _ENTITY_PATTERN.findall(question)})
+
+    if total == 0:
+        return "unknown", 0.0, entities
+
+    intent = max(scores, key=scores.get)
+    best = scores[intent]
+    confidence = (best / total) * min(1.0, best / 3.0)
+    return intent, round(confidence, 3), entities
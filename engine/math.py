@@ -1,15 +1,97 @@
 # File: engine/math.py
 
+import threading
+from collections import OrderedDict
 import pandas as pd
+from utils import instrument
+
+ADS_COLUMNS = ["Cost", "Conversions", "Clicks", "Conv. rate"]
+GA_COLUMNS = ["Active users"]
 
 def safe_percent_change(current, previous):
-    if previous == 0 or previous is None:
+    if previous == 0 or previous is None or current is None:
         return None
     return ((current - previous) / previous) * 100
 
 def format_delta(val):
     return f"{val:+.1f}%" if val is not None else "N/A"
 
+def to_number(series):
+    """
+    Vectorized numeric parse for export columns like "$1,234.50", "3.2%" or "--".
+    Anything unparseable becomes NaN. Already-numeric columns pass straight through.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+    try:
+        # Plain numbers in a text column (Clicks, Conversions) need no cleanup
+        return series.astype("float64")
+    except (ValueError, TypeError):
+        pass
+    cleaned = series.astype("string").str.replace(r"[\$,%\s]", "", regex=True)
+    try:
+        # Fast typed cast; only fall back to the element-wise coercing parser on junk like "--"
+        return cleaned.astype("float64")
+    except (ValueError, TypeError):
+        return pd.to_numeric(cleaned, errors="coerce").astype("float64")
+
+def _finish(sums):
+    out = pd.DataFrame(index=sums.index)
+    out["cost"] = sums["Cost"]
+    out["conversions"] = sums["Conversions"]
+    out["clicks"] = sums["Clicks"]
+    # Weight each row's rate by its clicks; fall back to a plain mean when there are no clicks
+    weighted = sums["weighted_rate"] / sums["rate_clicks"].where(sums["rate_clicks"] > 0)
+    plain = sums["rate_sum"] / sums["rate_count"].where(sums["rate_count"] > 0)
+    out["conversion_rate"] = weighted.fillna(plain)
+    out["cpl"] = sums["Cost"] / sums["Conversions"].where(sums["Conversions"] > 0)
+    return out
+
+def calculate_periods(ads_frames, by="Campaign"):
+    """
+    Per-campaign and total Ads metrics for any number of periods in one pass.
+    `ads_frames` is a list of DataFrames, newest first (period 0 = current).
+    Returns (per_campaign, totals): per_campaign is indexed by (period, campaign),
+    totals by period. Input frames are never modified.
+    """
+    parts = []
+    for period, df in enumerate(ads_frames):
+        if df is None:
+            continue
+        part = pd.DataFrame(index=df.index)
+        for col in ADS_COLUMNS:
+            part[col] = to_number(df[col]) if col in df.columns else float("nan")
+        part["period"] = period
+        part["campaign"] = df[by].astype("string") if by and by in df.columns else "(all)"
+        parts.append(part)
+
+    if not parts:
+        empty = pd.DataFrame(columns=["cost", "conversions", "clicks", "conversion_rate", "cpl"])
+        return empty, empty
+
+    rows = pd.concat(parts, ignore_index=True)
+    # Only rows with both a rate and clicks count towards the click-weighted rate
+    rows["weighted_rate"] = rows["Conv. rate"] * rows["Clicks"]
+    rows["rate_clicks"] = rows["Clicks"].where(rows["weighted_rate"].notna())
+    rows["rate_sum"] = rows["Conv. rate"]
+    rows["rate_count"] = rows["Conv. rate"].notna().astype("float64")
+
+    agg_cols = ["Cost", "Conversions", "Clicks", "rate_clicks", "weighted_rate", "rate_sum", "rate_count"]
+    by_campaign = rows.groupby(["period", "campaign"], sort=False)[agg_cols].sum()
+    by_period = by_campaign.groupby(level="period").sum()
+
+    return _finish(by_campaign), _finish(by_period)
+
+def ga_users_by_period(ga_frames):
+    """Total GA "Active users" per period (None where the column is missing)."""
+    users = []
+    for df in ga_frames:
+        if df is not None and GA_COLUMNS[0] in df.columns:
+            users.append(to_number(df[GA_COLUMNS[0]]).sum())
+        else:
+            users.append(None)
+    return users
+
 def calculate(raw_data):
     ads_df = raw_data["ads_df"]
     ga_df = raw_data["ga_df"]
@@ -17,40 +99,27 @@ def calculate(raw_data):
     prev_ga_df = raw_data.get("prev_ga_df")
     benchmark_cpl = raw_data["benchmark_cpl"]
 
-    # 🧹 Clean current ads data
-    ads_df["Cost"] = pd.to_numeric(ads_df["Cost"], errors="coerce")
-    ads_df["Conversions"] = pd.to_numeric(ads_df["Conversions"], errors="coerce")
-    ads_df["Conv. rate"] = pd.to_numeric(
-        ads_df["Conv. rate"].astype(str).str.replace('%', ''), errors="coerce"
-    )
-
-    total_cost = ads_df["Cost"].sum()
-    total_conversions = ads_df["Conversions"].sum()
-    avg_conv_rate = ads_df["Conv. rate"].mean()
-    cpl = total_cost / total_conversions if total_conversions > 0 else None
-
-    # 🧮 Get current GA traffic
-    ga_users = None
-    if "Active users" in ga_df.columns:
-        ga_users = pd.to_numeric(ga_df["Active users"], errors="coerce").sum()
-
-    # 🕰️ Process previous data
-    prev_cost = prev_conversions = prev_rate = prev_cpl = prev_ga_users = None
-
-    if prev_ads_df is not None:
-        prev_ads_df["Cost"] = pd.to_numeric(prev_ads_df["Cost"], errors="coerce")
-        prev_ads_df["Conversions"] = pd.to_numeric(prev_ads_df["Conversions"], errors="coerce")
-        prev_ads_df["Conv. rate"] = pd.to_numeric(
-            prev_ads_df["Conv. rate"].astype(str).str.replace('%', ''), errors="coerce"
-        )
-
-        prev_cost = prev_ads_df["Cost"].sum()
-        prev_conversions = prev_ads_df["Conversions"].sum()
-        prev_rate = prev_ads_df["Conv. rate"].mean()
-        prev_cpl = prev_cost / prev_conversions if prev_conversions > 0 else None
-
-    if prev_ga_df is not None and "Active users" in prev_ga_df.columns:
-        prev_ga_users = pd.to_numeric(prev_ga_df["Active users"], errors="coerce").sum()
+    # 🧹 Current + previous ads in one pass (inputs stay untouched so cached frames can be shared)
+    _, totals = calculate_periods([ads_df, prev_ads_df], by=None)
+
+    def total(period, col):
+        if period not in totals.index:
+            return None
+        value = totals.at[period, col]
+        return None if pd.isna(value) else value
+
+    total_cost = total(0, "cost")
+    total_conversions = total(0, "conversions")
+    avg_conv_rate = total(0, "conversion_rate")
+    cpl = total(0, "cpl")
+
+    # 🕰️ Previous period (None when there's no previous export)
+    prev_conversions = total(1, "conversions")
+    prev_rate = total(1, "conversion_rate")
+    prev_cpl = total(1, "cpl")
+
+    # 🧮 GA traffic
+    ga_users, prev_ga_users = ga_users_by_period([ga_df, prev_ga_df])
 
     # 🧮 % Changes
     cpl_change = safe_percent_change(cpl, prev_cpl)
@@ -77,3 +146,31 @@ def calculate(raw_data):
         "user_change": user_change,
         "lead_change": lead_change
     }
+
+# Metrics for the same Drive file versions never change, so keep recent results around
+_memo_lock = threading.Lock()
+_memo = OrderedDict()
+MEMO_SIZE = 256
+
+def calculate_cached(raw_data):
+    """calculate(), memoized on the Drive file versions + benchmark when retrieve provided them."""
+    versions = raw_data.get("versions")
+    if versions is None:
+        return calculate(raw_data)
+
+    key = (versions, raw_data.get("benchmark_cpl"))
+    with _memo_lock:
+        hit = key in _memo
+        if hit:
+            _memo.move_to_end(key)
+            cached = dict(_memo[key])
+    instrument.cache_event("metrics", hit)
+    if hit:
+        return cached
+
+    metrics = calculate(raw_data)
+    with _memo_lock:
+        _memo[key] = metrics
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return dict(metrics)
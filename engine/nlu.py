@@ -2,34 +2,69 @@
 
 import os
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
-from utils.notion_utils import fetch_all_clients
+import threading
+from engine.slug_index import match_client
+from engine import intent_rules
+from utils import llm, instrument
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Local rule scores at or above this skip the GPT round-trip
+NLU_LOCAL_THRESHOLD = float(os.getenv("NLU_LOCAL_THRESHOLD", 0.6))
+
+_stats_lock = threading.Lock()
+_stats = {"local": 0, "llm": 0, "confidence_total": 0.0}
 
 def detect_slug_from_question(question: str, fallback_slug: str = "") -> str:
     """
-    Broad-match slug detection using Notion client data.
+    Broad-match slug detection using the shared client registry.
     Returns best match or fallback slug if none found.
     """
-    question_lower = question.lower()
-    for client in fetch_all_clients():
-        if client["name"] in question_lower:
-            print(f"🔎 Detected client: {client['name']} → Slug: {client['slug']}")
-            return client["slug"]
+    match = match_client(question)
+    if match:
+        print(f"🔎 Detected client: {match['name']} → Slug: {match['slug']}")
+        return match["slug"]
     print("⚠️ No match found, using fallback slug.")
     return fallback_slug
 
 
+def stats():
+    """Local hit rate and average local confidence since startup."""
+    with _stats_lock:
+        total = _stats["local"] + _stats["llm"]
+        return {
+            "local": _stats["local"],
+            "llm": _stats["llm"],
+            "local_hit_rate": _stats["local"] / total if total else 0.0,
+            "avg_confidence": _stats["confidence_total"] / total if total else 0.0,
+        }
+
+
 def parse(question, fallback_slug):
     """
-    Uses GPT to extract intent and entities from a user question.
+    Extracts intent and entities from a user question.
+    Tries the local rule classifier first and only asks GPT when it isn't confident.
     Also detects the appropriate client slug from the question text.
     """
     resolved_slug = detect_slug_from_question(question, fallback_slug)
 
+    intent, confidence, entities = intent_rules.classify(question)
+    local_hit = confidence >= NLU_LOCAL_THRESHOLD
+    with _stats_lock:
+        _stats["local" if local_hit else "llm"] += 1
+        _stats["confidence_total"] += confidence
+    instrument.incr("dexter_nlu_total", source="local" if local_hit else "llm")
+
+    if local_hit:
+        print(f"⚡ Local intent: {intent} (confidence {confidence:.2f})")
+        return {
+            "intent": intent,
+            "entities": entities,
+            "slug": resolved_slug,
+            "confidence": confidence,
+            "source": "local"
+        }
+
+    print(f"🤔 Local intent confidence {confidence:.2f} below {NLU_LOCAL_THRESHOLD}, asking GPT...")
+
     prompt = f"""
     You're an intelligent assistant analyzing a marketing question.
 
@@ -41,8 +76,8 @@ def parse(question, fallback_slug):
     Only respond with valid JSON.
     """
 
-    response = client.chat.completions.create(
-        model="gpt-4",
+    response = llm.chat(
+        "nlu",
         messages=[{"role": "user", "content": prompt}]
     )
 
@@ -50,6 +85,7 @@ def parse(question, fallback_slug):
 
     try:
         parsed = json.loads(content)
+        parsed["source"] = "llm"
     except json.JSONDecodeError:
         parsed = {
             "intent": "unknown",
@@ -59,3 +95,9 @@ def parse(question, fallback_slug):
         }
 
     return parsed
+
+
+instrument.register_gauge(
+    "dexter_nlu",
+    lambda: {(("stat", k),): v for k, v in stats().items()}
+)
@@ -1,107 +1,248 @@
 # File: engine/pipeline.py
 
-from . import nlu, retrieve, math, trends, strategy, pr, polish
-from utils.notion_utils import fetch_all_clients
-import re
+from . import nlu, retrieve, math, trends, strategy, pr, polish, dag, fast_path
+from .slug_index import match_client
+from .answer_cache import ANSWERS
+import os
+from utils import instrument, deadline
+from utils.cache import DiskCache
+
+# user_id -> last used slug, in SQLite so every web worker process sees the same conversation state
+CONVERSATION_TTL = int(os.getenv("CONVERSATION_TTL", 24 * 3600))
+CONVERSATION_MAX_USERS = int(os.getenv("CONVERSATION_MAX_USERS", 10000))
+RECENT_SLUGS = DiskCache("conversations", ttl=CONVERSATION_TTL, max_entries=CONVERSATION_MAX_USERS)
+# user_id -> the question behind their last quick answer, until a "more" reply or any full answer uses it up
+QUICK_FOLLOW_UP_TTL = int(os.getenv("QUICK_FOLLOW_UP_TTL", 15 * 60))
+QUICK_QUESTIONS = DiskCache("quick_questions", ttl=QUICK_FOLLOW_UP_TTL, max_entries=CONVERSATION_MAX_USERS)
+
+# Seconds the whole pipeline may take, how long trends may take, and how much time must be
+# left for strategy + pr before trends are fetched at all (otherwise only cached trends are used)
+PIPELINE_DEADLINE = float(os.getenv("PIPELINE_DEADLINE", 60))
+TRENDS_BUDGET = float(os.getenv("TRENDS_BUDGET", 15))
+TRENDS_MIN_REMAINING = float(os.getenv("TRENDS_MIN_REMAINING", 30))
+TRENDS_UNAVAILABLE = "(No fresh market trends available right now; focus on the client's own data.)"
+
+# Answer purely numeric questions from the metrics alone (no LLM calls)
+FAST_PATH = os.getenv("DEXTER_FAST_PATH", "1") == "1"
 
-# Global cache of known clients
-try:
-    KNOWN_CLIENTS = fetch_all_clients()  # Returns list of {"name": ..., "slug": ...}
-    print(f"✅ Loaded {len(KNOWN_CLIENTS)} clients from Notion.")
-except Exception as e:
-    print("❌ Error loading clients from Notion:", str(e))
-    KNOWN_CLIENTS = []
-
-RECENT_SLUGS = {}  # user_id -> last used slug
-
-
-def normalize_string(s: str) -> str:
-    # Remove any non-alphanumeric characters and convert to lowercase.
-    return re.sub(r'\W+', '', s.lower())
 
 def match_slug_from_text(text: str) -> str:
-    norm_text = normalize_string(text)
-    for client in KNOWN_CLIENTS:
-        norm_name = normalize_string(client["name"])
-        norm_slug = normalize_string(client["slug"])
-        # Check if either the normalized name or slug is in the normalized text.
-        if norm_name in norm_text or norm_slug in norm_text:
-            print(f"🔎 Matched client '{client['name']}' (slug: {client['slug']}) with input '{text}'")
-            return client["slug"]
+    client = match_client(text)
+    if client:
+        print(f"🔎 Matched client '{client['name']}' (slug: {client['slug']}) with input '{text}'")
+        return client["slug"]
     return None
 
-def analyze_for_question(slug: str, user_question: str, fallback: bool = False, user_id: str = None) -> str:
+def analyze_for_question(slug: str, user_question: str, fallback: bool = False, user_id: str = None,
+                         on_metrics=None, finish=None) -> str:
     """
     Main pipeline executor. If fallback=True, skips data retrieval and math,
     but still uses trends + strategy layers.
+    Independent stages (NLU, Drive, Notion, trends) run concurrently; strategy → pr → polish stay ordered.
+    on_metrics, if given, is called with the Key Metrics block as soon as the math is done.
+    finish(context), if given, turns the polished context into the final answer, and it is that
+    answer which gets returned and cached.
+    Answers are cached per data version + metrics + intent + question; a hit skips strategy/pr/polish
+    (and finish).
+    Everything runs under PIPELINE_DEADLINE (or the caller's earlier deadline); trends are dropped
+    rather than allowed to make the answer late.
     """
-    print("🧠 Starting NLU layer...")
-    question_context = nlu.parse(user_question, slug)
-    if user_id:
-        question_context["user_id"] = user_id
-    print("📎 NLU Output:", question_context)
+    cache_key = {}
+    degraded = []  # stages that fell back to a cheaper result; such answers aren't cached
 
-    metrics = {}
-    raw_data = {}
+    def run_nlu():
+        print("🧠 Starting NLU layer...")
+        question_context = nlu.parse(user_question, slug)
+        if user_id:
+            question_context["user_id"] = user_id
+        print("📎 NLU Output:", question_context)
+        return question_context
 
-    if not fallback:
-        print("📥 Retrieving data...")
-        raw_data = retrieve.collect(slug)
+    def run_retrieve(files, notion_data):
+        raw_data = retrieve.assemble(files, notion_data)
         print("📊 Raw data retrieved for", slug)
         print("📎 Industry:", raw_data.get('industry'))
         print("📎 Benchmark CPL:", raw_data.get('benchmark_cpl'))
         print("📎 Ads rows:", len(raw_data.get("ads_df", [])))
         print("📎 GA rows:", len(raw_data.get("ga_df", [])))
+        return raw_data
 
+    def run_math(raw_data):
         print("🧮 Calculating performance metrics...")
-        metrics = math.calculate(raw_data)
+        return math.calculate_cached(raw_data)
+
+    def run_trends(industry):
+        print("🌐 Gathering market trends...")
+        left = deadline.remaining()
+        if left is not None and left < TRENDS_MIN_REMAINING:
+            print(f"⏳ {left:.0f}s left, using cached trends only")
+            instrument.incr("dexter_degraded_total", stage="trends")
+            degraded.append("trends")
+            return trends.cached_trends(industry) or TRENDS_UNAVAILABLE
+        try:
+            with deadline.deadline(TRENDS_BUDGET):
+                return trends.get_trends(industry)
+        except Exception as e:
+            # Trends are nice to have; don't let them sink the answer
+            print("⚠️ Trends unavailable, continuing without them:", str(e))
+            instrument.incr("dexter_degraded_total", stage="trends")
+            degraded.append("trends")
+            return TRENDS_UNAVAILABLE
+
+    def run_strategy(metrics, industry_trends, question_context, _cache_miss=None):
+        print("🧠 Generating strategic insight...")
+        return strategy.generate(metrics, industry_trends, question_context)
+
+    def run_pr(strategic_thought, question_context):
+        print("🪄 Translating into PR narrative...")
+        return pr.translate(strategic_thought, question_context)
+
+    def run_polish(narrative, metrics, question_context):
+        print("🧽 Final polishing for clarity and format...")
+        return polish.refine(narrative, metrics, question_context)
+
+    def check_answer_cache(raw_data, metrics, question_context, _key_metrics):
+        key, data_version = ANSWERS.key_for(slug, raw_data, metrics, question_context, user_question,
+                                            kind="final" if finish else "context")
+        cache_key.update(key=key, data_version=data_version)
+        cached = ANSWERS.get(key, data_version)
+        if cached is not None:
+            print("⚡ Answer cache hit for", slug)
+            return dag.Finish(cached)
+        return None
+
+    stages = [
+        dag.Stage("nlu", run_nlu),
+        # Outside fallback, strategy also waits for the answer cache to miss
+        dag.Stage("strategy", run_strategy,
+                  deps=("math", "trends", "nlu") + (() if fallback else ("answer_cache",))),
+        dag.Stage("pr", run_pr, deps=("strategy", "nlu")),
+        dag.Stage("polish", run_polish, deps=("pr", "math", "nlu")),
+    ]
+
+    if not fallback:
+        print("📥 Retrieving data...")
+        stages += [
+            dag.Stage("drive", lambda: retrieve.collect_files(slug)),
+            dag.Stage("notion", lambda: retrieve.collect_notion(slug)),
+            dag.Stage("retrieve", run_retrieve, deps=("drive", "notion")),
+            dag.Stage("math", run_math, deps=("retrieve",)),
+            dag.Stage("key_metrics", lambda metrics: on_metrics and on_metrics(polish.key_metrics(metrics)),
+                      deps=("math",)),
+            # Waits for key_metrics so a cache hit still streams the metrics header first
+            dag.Stage("answer_cache", check_answer_cache, deps=("retrieve", "math", "nlu", "key_metrics")),
+            # Trends only needs the industry from Notion, not the CSVs
+            dag.Stage("trends", lambda notion_data: run_trends(notion_data.get("industry", "unknown")), deps=("notion",)),
+        ]
     else:
         # Safe defaults to avoid KeyErrors for references like lead_change/user_change
-        metrics = {
-            "total_cost": None,
-            "total_conversions": None,
-            "conversion_rate": None,
-            "cpl": None,
-            "benchmark_cpl": None,
-            "lead_change": None,
-            "user_change": None,
-        }
-
-    print("🌐 Gathering market trends...")
-    industry = raw_data.get("industry", "general marketing")
-    industry_trends = trends.get_trends(industry)
-
-    print("🧠 Generating strategic insight...")
-    strategic_thought = strategy.generate(metrics, industry_trends, question_context)
-
-    print("🪄 Translating into PR narrative...")
-    narrative = pr.translate(strategic_thought, question_context)
-
-    print("🧽 Final polishing for clarity and format...")
-    final_message = polish.refine(narrative, metrics, question_context)
-
+        stages += [
+            dag.Stage("math", lambda: {
+                "total_cost": None,
+                "total_conversions": None,
+                "conversion_rate": None,
+                "cpl": None,
+                "benchmark_cpl": None,
+                "lead_change": None,
+                "user_change": None,
+            }),
+            dag.Stage("trends", lambda: run_trends("general marketing")),
+        ]
+
+    with instrument.span("pipeline"), deadline.deadline(PIPELINE_DEADLINE):
+        results, timings = dag.run(stages)
+    for name, secs in timings.items():
+        instrument.observe(f"stage.{name}", secs)
+    print("⏱️ Stage timings:", {name: round(secs, 2) for name, secs in timings.items()})
+
+    if "polish" not in results:
+        print("✅ Pipeline complete (cached answer).")
+        return results["answer_cache"]
+
+    answer = finish(results["polish"]) if finish else results["polish"]
+    if cache_key and answer and not degraded:
+        ANSWERS.set(cache_key["key"], cache_key["data_version"], answer)
+    elif degraded:
+        print(f"⚠️ Not caching an answer built without {', '.join(degraded)}")
     print("✅ Pipeline complete.")
-    return final_message
+    return answer
 
 
-def run_pipeline(user_question: str, user_id: str = None) -> str:
-    """
-    External entry point to run the pipeline with dynamic slug detection and fallback support.
-    """
+def _resolve_slug(user_question, user_id=None):
+    """Client named in the question, else the one this user asked about last (remembered either way)."""
     slug = match_slug_from_text(user_question)
     print(f"🔍 Matched slug from text: {slug}")
 
-
     if not slug and user_id:
         slug = RECENT_SLUGS.get(user_id)
+    if slug and user_id:
+        RECENT_SLUGS.set(user_id, slug)
+    return slug
+
+
+def run_pipeline(user_question: str, user_id: str = None, on_metrics=None, finish=None) -> str:
+    """
+    External entry point to run the pipeline with dynamic slug detection and fallback support.
+    """
+    slug = _resolve_slug(user_question, user_id)
+    if user_id:
+        # A full answer moves the conversation on; "more" no longer refers to an older quick answer
+        QUICK_QUESTIONS.invalidate(user_id)
 
     fallback_mode = False
 
-    if slug:
-        if user_id:
-            RECENT_SLUGS[user_id] = slug
-    else:
+    if not slug:
         fallback_mode = True
         slug = "general"  # Not used to fetch data, just passed to NLU
 
-    return analyze_for_question(slug, user_question, fallback=fallback_mode, user_id=user_id)
+    return analyze_for_question(slug, user_question, fallback=fallback_mode, user_id=user_id,
+                                on_metrics=on_metrics, finish=finish)
+
+
+def quick_answer(user_question: str, user_id: str = None):
+    """
+    Answers a purely quantitative question ("what was X's CPL last week?") from the
+    metrics alone: Drive + Notion + math, no LLM. Returns None when the question
+    needs the full pipeline (or no client data is available), so the caller can fall back.
+    """
+    if not FAST_PATH:
+        return None
+    client = match_client(user_question)
+    names = [client["name"], client["slug"], *client.get("aliases", [])] if client else []
+    wanted = fast_path.requested_metrics(user_question, names)
+    if wanted is None:
+        return None
+    slug = _resolve_slug(user_question, user_id)
+    if not slug:
+        return None
+
+    stages = [
+        dag.Stage("drive", lambda: retrieve.collect_files(slug)),
+        dag.Stage("notion", lambda: retrieve.collect_notion(slug)),
+        dag.Stage("math", lambda files, notion_data: math.calculate_cached(retrieve.assemble(files, notion_data)),
+                  deps=("drive", "notion")),
+    ]
+    try:
+        with instrument.span("fast_path"), deadline.deadline(PIPELINE_DEADLINE):
+            results, _ = dag.run(stages)
+    except Exception as e:
+        print("⚠️ Fast path unavailable, using the full pipeline:", str(e))
+        return None
+
+    if user_id:
+        # Remembered so a "more" reply can ask for the full narrative
+        QUICK_QUESTIONS.set(user_id, user_question)
+    instrument.incr("dexter_fast_path_total")
+    print(f"⚡ Answered from metrics only for {slug}")
+    return fast_path.answer(slug, results["math"], wanted)
+
+
+def follow_up_question(text: str, user_id: str = None):
+    """The question behind the user's last quick answer if `text` asks for more, else None."""
+    if not user_id or not fast_path.is_follow_up(text):
+        return None
+    question = QUICK_QUESTIONS.get(user_id)
+    if question is not None:
+        # Used once; a later "why?" is about whatever was answered since
+        QUICK_QUESTIONS.invalidate(user_id)
+    return question
@@ -1,9 +1,12 @@
 # File: engine/polish.py
 
 def refine(narrative: str, metrics: dict, context: dict) -> str:
-    slug = context.get("slug", "this business")
+    return "\n".join([narrative.strip(), "", key_metrics(metrics)])
 
-    lines = [narrative.strip(), "", "📊 *Key Metrics:*"]
+
+def key_metrics(metrics: dict) -> str:
+    """The Key Metrics block on its own; needs no LLM, so it can be shown before the narrative."""
+    lines = ["📊 *Key Metrics:*"]
 
     # Ad Spend
     total_cost = metrics.get("total_cost")
@@ -1,11 +1,6 @@
 # File: engine/pr.py
 
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from utils import llm
 
 def translate(strategic_thought: str, context: dict) -> str:
     user_question = context.get("user_question", "a business question")
@@ -24,8 +19,8 @@ Be bold, but not buzzwordy. Keep it grounded and emotionally resonant.
 Respond in 4 sentences or less.
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4",
+    response = llm.chat(
+        "pr",
         messages=[{"role": "user", "content": prompt}]
     )
 
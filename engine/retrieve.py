@@ -2,35 +2,91 @@
 
 from utils.drive_utils import get_valid_csvs, get_previous_csvs, download_csv
 from utils.notion_utils import get_client_properties_from_notion
+from utils import history_store
+from utils.singleflight import SingleFlight
+from .math import ADS_COLUMNS, GA_COLUMNS, to_number
 import pandas as pd
 
-def collect(slug):
+# Only what the math (and per-campaign history) reads is kept from each export
+EXPORT_COLUMNS = {
+    "ads": {"Campaign": None, **{col: to_number for col in ADS_COLUMNS}},
+    "ga": {col: to_number for col in GA_COLUMNS},
+}
+
+# Teammates asking about the same client at once share one set of Drive downloads
+_FILES_FLIGHT = SingleFlight("drive_files")
+
+def _download(slug, kind, file_meta):
+    df = download_csv(file_meta['id'], modified_time=file_meta.get('modifiedTime'), columns=EXPORT_COLUMNS[kind])
+    # Keep every export we've seen in the local history store (no-op if already ingested)
+    try:
+        history_store.ingest(slug, kind, file_meta, df)
+    except Exception as e:
+        print(f"⚠️ Could not ingest {kind} export into history:", str(e))
+    return df
+
+def collect_files(slug):
+    """Current + previous Ads/GA frames for a client; concurrent calls for one slug are coalesced."""
+    return _FILES_FLIGHT.do(slug.lower(), lambda: _collect_files(slug))
+
+def _collect_files(slug):
     # 1. Get the latest Google Ads and GA CSVs
     ads_file, ga_file = get_valid_csvs(slug)
     if not ads_file or not ga_file:
         raise ValueError(f"No recent ads or GA files found for slug `{slug}`.")
 
-    ads_df = download_csv(ads_file['id'])
-    ga_df = download_csv(ga_file['id'])
+    ads_df = _download(slug, "ads", ads_file)
+    ga_df = _download(slug, "ga", ga_file)
 
     # 2. Get previous versions (optional)
     prev_ads_file, prev_ga_file = get_previous_csvs(slug, exclude_id=ads_file['id'])
-    prev_ads_df = download_csv(prev_ads_file['id']) if prev_ads_file else None
-    prev_ga_df = download_csv(prev_ga_file['id']) if prev_ga_file else None
-
-    # 3. Get metadata from Notion (normalized keys)
-    notion_data = get_client_properties_from_notion(slug)
-
-    industry = notion_data.get("industry", "unknown")
-    benchmark_cpl = notion_data.get("benchmark_cpl", 300)
+    prev_ads_df = _download(slug, "ads", prev_ads_file) if prev_ads_file else None
+    prev_ga_df = _download(slug, "ga", prev_ga_file) if prev_ga_file else None
 
+    # Identifies exactly which exports these frames came from (used to key derived results)
+    versions = tuple(
+        (f['id'], f.get('modifiedTime')) if f else None
+        for f in (ads_file, ga_file, prev_ads_file, prev_ga_file)
+    )
 
     return {
         "ads_df": ads_df,
         "ga_df": ga_df,
         "prev_ads_df": prev_ads_df,
         "prev_ga_df": prev_ga_df,
+        "versions": versions,
+    }
+
+def collect_notion(slug):
+    # 3. Get metadata from Notion (normalized keys)
+    return get_client_properties_from_notion(slug)
+
+def assemble(files, notion_data):
+    industry = notion_data.get("industry", "unknown")
+    benchmark_cpl = notion_data.get("benchmark_cpl", 300)
+
+    return {
+        **files,
         "notion": notion_data,
         "industry": industry,
         "benchmark_cpl": benchmark_cpl
     }
+
+def collect(slug):
+    return assemble(collect_files(slug), collect_notion(slug))
+
+def history(slug, kind="ads", columns=None, start=None, end=None):
+    """
+    Every ingested export for a client in [start, end] (YYYY-MM-DD), read from
+    the local Parquet store instead of Drive. Rows carry "period", "export" (Drive file id)
+    and "modified_time" columns.
+    """
+    return history_store.scan(slug, kind, columns=columns, start=start, end=end)
+
+def history_frames(slug, start=None, end=None, columns=None):
+    """Ads history split into one frame per export, newest first — ready for math.calculate_periods."""
+    df = history(slug, "ads", columns=columns, start=start, end=end)
+    if df is None or df.empty:
+        return []
+    exports = sorted(df.groupby("export"), key=lambda item: item[1]["modified_time"].iat[0], reverse=True)
+    return [group.drop(columns=["period", "export", "modified_time"]) for _, group in exports]
@@ -0,0 +1,97 @@
+# File: engine/slug_index.py
+
+import re
+import threading
+from collections import deque
+from utils.client_registry import CLIENTS
+
+
+def normalize_string(s: str) -> str:
+    # Remove any non-alphanumeric characters and convert to lowercase.
+    return re.sub(r'\W+', '', s.lower())
+
+
+class SlugIndex:
+    """
+    Aho-Corasick automaton over normalized client names, slugs and aliases.
+    match() makes one pass over the text and returns the client whose pattern
+    is the longest match; ties go to the client listed first.
+    """
+
+    def __init__(self, clients):
+        self.goto = [{}]
+        self.fail = [0]
+        self.best = [None]  # node -> (pattern length, client order, client) of longest match ending here
+
+        for order, client in enumerate(clients):
+            patterns = [client["name"], client["slug"], *client.get("aliases", [])]
+            for pattern in {normalize_string(p) for p in patterns if p}:
+                if pattern:
+                    self._add(pattern, (len(pattern), order, client))
+        self._link()
+
+    def _add(self, pattern, entry):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.best.append(None)
+            node = nxt
+        current = self.best[node]
+        # Same pattern for several clients: the first one listed wins
+        if current is None or entry[1] < current[1]:
+            self.best[node] = entry
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                # A node's own pattern is always longer than anything reachable by its fail link
+                if self.best[child] is None:
+                    self.best[child] = self.best[self.fail[child]]
+
+    def match(self, text: str):
+        goto, fail, best = self.goto, self.fail, self.best
+        node = 0
+        found = None
+        for ch in normalize_string(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            entry = best[node]
+            if entry is not None and (found is None or entry[0] > found[0] or
+                                      (entry[0] == found[0] and entry[1] < found[1])):
+                found = entry
+        return found[2] if found else None
+
+
+_index_lock = threading.Lock()
+_index = (None, None)  # (registry version, SlugIndex)
+
+
+def get_index() -> SlugIndex:
+    """Returns the index for the current registry snapshot, rebuilding it when the version changes."""
+    global _index
+    current, clients = CLIENTS.versioned()
+    version, index = _index
+    if index is None or version != current:
+        with _index_lock:
+            version, index = _index
+            if index is None or version != current:
+                index = SlugIndex(clients)
+                _index = (current, index)
+    return index
+
+
+def match_client(text: str):
+    return get_index().match(text)
@@ -1,11 +1,6 @@
 # File: engine/strategy.py
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from utils import llm
 
 def generate(metrics, trends, question_context):
     industry = question_context.get("industry", "Unknown Industry")
@@ -74,8 +69,8 @@ Please return one strategic insight that:
 Respond with a single paragraph — no greetings, no summaries.
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4",
+    response = llm.chat(
+        "strategy",
         messages=[{"role": "user", "content": prompt}]
     )
 
@@ -1,13 +1,17 @@
 # File: engine/trends.py
 
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
+from utils.cache import DiskCache
+from utils import llm
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Trends only depend on the industry, so one answer per industry is reused until it expires
+TRENDS_TTL = int(os.getenv("TRENDS_CACHE_TTL", 24 * 3600))
+TRENDS_CACHE = DiskCache("trends", ttl=TRENDS_TTL, max_entries=int(os.getenv("TRENDS_CACHE_SIZE", 500)))
 
-def get_trends(industry: str) -> str:
+def _cache_key(industry: str) -> str:
+    return (industry or "").strip().lower()
+
+def fetch_trends(industry: str) -> str:
     prompt = f"""
 Act as a marketing trend analyst.
 
@@ -16,9 +20,23 @@ In 3 sentences, summarize the current major trends and strategies in the **{indu
 Avoid generalities — be specific and timely (think Q2 2025). Mention tools, tactics, and changes in consumer behavior if relevant.
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4",
+    response = llm.chat(
+        "trends",
         messages=[{"role": "user", "content": prompt}]
     )
 
     return response.choices[0].message.content.strip()
+
+def get_trends(industry: str) -> str:
+    return TRENDS_CACHE.get_or_set(_cache_key(industry), lambda: fetch_trends(industry))
+
+def cached_trends(industry: str):
+    """Trends from the cache only (None on a miss), for when there's no time to ask GPT."""
+    return TRENDS_CACHE.get(_cache_key(industry))
+
+def invalidate_trends(industry: str = None):
+    """Drops the cached trends for one industry, or for all of them."""
+    if industry is None:
+        TRENDS_CACHE.clear()
+    else:
+        TRENDS_CACHE.invalidate(_cache_key(industry))
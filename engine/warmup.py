@@ -0,0 +1,83 @@
+# File: engine/warmup.py
+#
+# Background warm-up: walks the client registry and pre-fills the Drive, Notion,
+# metrics and trends caches so the first question of the day is a warm one.
+# Run standalone with: python -m engine.warmup [--once]
+
+import os
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.client_registry import CLIENTS
+from utils import llm_gateway
+from . import retrieve, math, trends
+
+WARMUP_INTERVAL = int(os.getenv("WARMUP_INTERVAL", 1800))
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", 2))
+WARMUP_JITTER = float(os.getenv("WARMUP_JITTER", 5.0))
+
+
+def warm_client(slug):
+    # Trends calls queue behind anything a user is waiting on
+    with llm_gateway.priority("background"):
+        raw_data = retrieve.collect(slug)
+        math.calculate_cached(raw_data)
+        trends.get_trends(raw_data.get("industry", "unknown"))
+
+
+def run_once(concurrency=WARMUP_CONCURRENCY, jitter=WARMUP_JITTER):
+    """Warms every known client, at most `concurrency` at a time, each start spread by random jitter."""
+    slugs = [client["slug"] for client in CLIENTS.clients()]
+    started = time.monotonic()
+    counts = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def _warm(slug):
+        # Spread requests out so a full pass doesn't burst against API quotas
+        time.sleep(random.uniform(0, jitter))
+        try:
+            warm_client(slug)
+            outcome = "ok"
+        except Exception as e:
+            print(f"⚠️ Warm-up failed for {slug}:", str(e))
+            outcome = "failed"
+        with lock:
+            counts[outcome] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="dexter-warmup") as executor:
+        list(executor.map(_warm, slugs))
+
+    print(f"🔥 Warm-up pass done: {counts['ok']} ok, {counts['failed']} failed "
+          f"in {time.monotonic() - started:.1f}s.")
+    return counts
+
+
+class WarmupScheduler:
+    """Runs run_once() on a daemon thread every `interval` seconds (±10%)."""
+
+    def __init__(self, interval=WARMUP_INTERVAL):
+        self.interval = interval
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="dexter-warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                run_once()
+            except Exception as e:
+                print("❌ Warm-up pass crashed:", str(e))
+            time.sleep(self.interval * random.uniform(0.9, 1.1))
+
+
+if __name__ == "__main__":
+    if "--once" in sys.argv:
+        run_once()
+    else:
+        print(f"🔥 Warming clients every {WARMUP_INTERVAL}s...")
+        WarmupScheduler()._run()
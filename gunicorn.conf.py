@@ -0,0 +1,30 @@
+# File: gunicorn.conf.py
+#
+# Production serving: gunicorn -c gunicorn.conf.py app:flask_app
+# Conversation state, trends and parsed frames live under DEXTER_CACHE_DIR (SQLite / Parquet),
+# so every worker process shares them. Run cache warm-up as its own process
+# (`python -m engine.warmup`) rather than DEXTER_WARMUP=1, which would start it in every worker.
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 3000)}"
+# Each worker is ~140 MB RSS once app + engine.pipeline are imported, before any frames are loaded
+# (pandas, pyarrow, googleapiclient), plus its parsed CSVs. Size WEB_CONCURRENCY to the instance:
+# 2 fits a 512 MB plan with headroom, add one per extra ~250 MB.
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+# Each worker acks Slack on request threads and runs pipelines on its own dispatch pool
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+# Slack retries after 3s, so requests themselves stay short; the long work is in the dispatch pool
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+# Import the app in each worker, not the master: background threads don't survive fork()
+preload_app = False
+accesslog = "-"
+
+
+def child_exit(server, worker):
+    # Stop serving an exited worker's last published /metrics
+    from utils import instrument
+    instrument.forget_worker(worker.pid)
@@ -0,0 +1,136 @@
+# File: test_answer_cache.py
+
+import time
+import pytest
+from engine import dag, pipeline
+from engine.answer_cache import AnswerCache, ANSWERS
+
+
+def test_new_data_version_drops_older_answers_for_that_slug():
+    cache = AnswerCache(max_entries=10)
+    cache.set(("acme", "v1", "m", "review", "hows acme", "final"), "v1", "old answer")
+    cache.set(("other", "v1", "m", "review", "hows other", "final"), "v1", "other answer")
+
+    assert cache.get(("acme", "v1", "m", "review", "hows acme", "final"), "v1") == "old answer"
+    # The first lookup that sees v2 for acme drops every v1 answer for acme, and only for acme
+    assert cache.get(("acme", "v2", "m", "review", "hows acme", "final"), "v2") is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["entries"] == 1
+    assert cache.get(("other", "v1", "m", "review", "hows other", "final"), "v1") == "other answer"
+
+
+def test_expired_answers_are_misses():
+    cache = AnswerCache(ttl=0)
+    cache.set(("acme", "v1", "m", "review", "q", "final"), "v1", "answer")
+    time.sleep(0.01)
+    assert cache.get(("acme", "v1", "m", "review", "q", "final"), "v1") is None
+
+
+@pytest.fixture
+def stub_pipeline(monkeypatch):
+    """Every pipeline stage stubbed out; any real LLM call fails the test."""
+    calls = {"strategy": 0, "finish": 0}
+    state = {"version": "v1", "trends_fail": False}
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("unexpected LLM call")
+
+    def get_trends(industry):
+        if state["trends_fail"]:
+            raise RuntimeError("trends down")
+        return "trends"
+
+    def strategy(*args):
+        calls["strategy"] += 1
+        return "strategy"
+
+    monkeypatch.setattr("utils.llm.chat", no_llm)
+    monkeypatch.setattr(pipeline.nlu, "parse", lambda question, slug: {"intent": "performance_review"})
+    monkeypatch.setattr(pipeline.retrieve, "collect_files", lambda slug: {})
+    monkeypatch.setattr(pipeline.retrieve, "collect_notion", lambda slug: {"industry": "roofing"})
+    monkeypatch.setattr(pipeline.retrieve, "assemble", lambda files, notion: {
+        "versions": state["version"], "notion": notion, "industry": "roofing"})
+    monkeypatch.setattr(pipeline.math, "calculate_cached", lambda raw: {"cpl": 10.0})
+    monkeypatch.setattr(pipeline.trends, "get_trends", get_trends)
+    monkeypatch.setattr(pipeline.strategy, "generate", strategy)
+    monkeypatch.setattr(pipeline.pr, "translate", lambda *args: "narrative")
+    monkeypatch.setattr(pipeline.polish, "refine", lambda *args: "context")
+    ANSWERS.invalidate()
+
+    def finish(context):
+        calls["finish"] += 1
+        return f"final answer from {context}"
+
+    yield calls, state, finish
+    ANSWERS.invalidate()
+
+
+def test_cached_final_answer_skips_every_llm_stage(stub_pipeline):
+    calls, _, finish = stub_pipeline
+    question = "How is Acme doing this week?"
+
+    first = pipeline.analyze_for_question("acme", question, finish=finish)
+    assert first == "final answer from context"
+    assert calls == {"strategy": 1, "finish": 1}
+
+    # Same question, same data: returned straight from the cache, no strategy and no final GPT call
+    assert pipeline.analyze_for_question("acme", "how is acme doing this week", finish=finish) == first
+    assert calls == {"strategy": 1, "finish": 1}
+
+
+def test_new_data_version_recomputes_the_answer(stub_pipeline):
+    calls, state, finish = stub_pipeline
+    pipeline.analyze_for_question("acme", "How is Acme doing?", finish=finish)
+    state["version"] = "v2"
+    pipeline.analyze_for_question("acme", "How is Acme doing?", finish=finish)
+    assert calls["finish"] == 2
+
+
+def test_context_and_final_answers_are_cached_apart(stub_pipeline):
+    calls, _, finish = stub_pipeline
+    assert pipeline.analyze_for_question("acme", "How is Acme doing?") == "context"
+    assert pipeline.analyze_for_question("acme", "How is Acme doing?", finish=finish) == "final answer from context"
+    assert calls["finish"] == 1
+
+
+def test_answers_without_trends_are_not_cached(stub_pipeline):
+    calls, state, finish = stub_pipeline
+    state["trends_fail"] = True
+    pipeline.analyze_for_question("acme", "How is Acme doing?", finish=finish)
+    state["trends_fail"] = False
+    pipeline.analyze_for_question("acme", "How is Acme doing?", finish=finish)
+    assert calls["finish"] == 2
+
+
+def test_finish_ends_the_run_without_its_dependents():
+    ran = []
+
+    def record(name, value=None):
+        ran.append(name)
+        return value
+
+    stages = [
+        dag.Stage("check", lambda: dag.Finish("cached")),
+        dag.Stage("expensive", lambda check: record("expensive"), deps=("check",)),
+        dag.Stage("after", lambda expensive: record("after"), deps=("expensive",)),
+    ]
+    results, _ = dag.run(stages)
+    assert results["check"] == "cached"
+    assert "expensive" not in results and "after" not in results
+    assert ran == []
+
+
+def test_stage_returning_none_does_not_finish():
+    stages = [
+        dag.Stage("check", lambda: None),
+        dag.Stage("expensive", lambda check: "computed", deps=("check",)),
+    ]
+    results, _ = dag.run(stages)
+    assert results == {"check": None, "expensive": "computed"}
+
+
+if __name__ == "__main__":
+    for name in ("test_new_data_version_drops_older_answers_for_that_slug", "test_expired_answers_are_misses",
+                 "test_finish_ends_the_run_without_its_dependents", "test_stage_returning_none_does_not_finish"):
+        globals()[name]()
+        print(f"✅ {name}")
@@ -0,0 +1,129 @@
+# File: test_deadline.py
+
+import os
+import time
+import threading
+import multiprocessing
+import pytest
+from utils import deadline, instrument
+from utils.singleflight import SingleFlight
+
+
+def test_call_returns_within_its_timeout():
+    assert deadline.call("test.fast", lambda: 42, timeout=1) == 42
+
+
+def test_call_gives_up_at_the_timeout():
+    started = time.monotonic()
+    with pytest.raises(deadline.DeadlineExceeded):
+        deadline.call("test.slow", lambda: time.sleep(2), timeout=0.2, hedge=False)
+    assert time.monotonic() - started < 1
+
+
+def test_call_is_bounded_by_the_enclosing_deadline():
+    started = time.monotonic()
+    with deadline.deadline(0.2), pytest.raises(deadline.DeadlineExceeded):
+        deadline.call("test.slow", lambda: time.sleep(2), timeout=30, hedge=False)
+    assert time.monotonic() - started < 1
+
+
+def test_call_raises_the_callers_error():
+    def broken():
+        raise ValueError("nope")
+    with pytest.raises(ValueError):
+        deadline.call("test.error", broken, timeout=1)
+
+
+def test_slow_call_is_hedged_past_its_p95():
+    instrument.reset()
+    for _ in range(deadline.HEDGE_MIN_SAMPLES):
+        instrument.observe("test.hedge", 0.01)
+
+    attempts = []
+    lock = threading.Lock()
+
+    def first_hangs():
+        with lock:
+            attempts.append(1)
+            first = len(attempts) == 1
+        time.sleep(2 if first else 0)
+        return "hedged" if not first else "original"
+
+    started = time.monotonic()
+    assert deadline.call("test.hedge", first_hangs, timeout=5) == "hedged"
+    assert time.monotonic() - started < 1
+    assert len(attempts) == 2
+
+
+def test_singleflight_waiter_gives_up_at_its_deadline():
+    flight = SingleFlight()
+    leader = threading.Thread(target=lambda: flight.do("k", lambda: time.sleep(1) or "leader"))
+    leader.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    with deadline.deadline(0.2), pytest.raises(deadline.DeadlineExceeded):
+        flight.do("k", lambda: "never runs")
+    assert time.monotonic() - started < 0.6
+    assert flight.stats()["waiting"] == 0
+    leader.join()
+
+
+def test_abandoned_drive_download_stops_pulling_chunks():
+    import io
+    from utils.drive_utils import _MediaStream
+
+    class Downloader:
+        chunks = 0
+
+        def __init__(self, sink):
+            self.sink = sink
+
+        def next_chunk(self):
+            Downloader.chunks += 1
+            self.sink.write(b"x" * 10)
+            return None, False
+
+    stream = _MediaStream.__new__(_MediaStream)
+    io.RawIOBase.__init__(stream)
+    stream._sink = io.BytesIO()
+    stream._downloader = Downloader(stream._sink)
+    stream._pending = memoryview(b"")
+    stream._done = False
+    stream.network_seconds = 0.0
+
+    buffer = bytearray(10)
+    with deadline.deadline(0.1):
+        assert stream.readinto(buffer) == 10
+        time.sleep(0.15)
+        with pytest.raises(deadline.DeadlineExceeded):
+            stream.readinto(buffer)
+    assert Downloader.chunks == 1
+
+
+def _call_in_child(queue):
+    try:
+        queue.put(deadline.call("test.child", lambda: os.getpid(), timeout=2))
+    except Exception as e:
+        queue.put(repr(e))
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_gets_its_own_io_pool():
+    # The parent's pool has live threads; a forked child inherits the object but not the threads
+    assert deadline.call("test.parent", lambda: "parent", timeout=2) == "parent"
+
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_call_in_child, args=(queue,))
+    child.start()
+    result = queue.get(timeout=10)
+    child.join(timeout=10)
+    assert result == child.pid
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
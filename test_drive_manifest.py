@@ -0,0 +1,109 @@
+# File: test_drive_manifest.py
+
+import time
+from datetime import datetime, timedelta, timezone
+from bench.fakes import FakeWorld, FakeDriveService
+from utils.drive_manifest import DriveManifest
+
+
+def make_manifest(tmp_path, world, **kwargs):
+    service = FakeDriveService(world)
+    return DriveManifest(lambda: service, path=str(tmp_path / "manifest.json"), sync_interval=0, **kwargs), service
+
+
+def ids(entries):
+    return [meta["id"] for meta in entries]
+
+
+def test_bootstrap_indexes_latest_and_previous(tmp_path):
+    world = FakeWorld(clients=2, rows=5)
+    manifest, _ = make_manifest(tmp_path, world)
+    manifest.sync()
+
+    assert manifest.latest("client0000_ads")["id"] == "client0000-ads-cur"
+    assert manifest.previous("client0000_ads")["id"] == "client0000-ads-prev"
+    assert manifest.previous("client0000_ads", exclude_id="client0000-ads-prev") is None
+    assert manifest.latest("CLIENT0001_GA")["id"] == "client0001-ga-cur"
+    assert manifest.latest("nobody_ads") is None
+
+
+def test_sync_replays_change_pages(tmp_path):
+    world = FakeWorld(clients=2, rows=5)
+    manifest, _ = make_manifest(tmp_path, world)
+    manifest.sync()
+
+    newest = datetime.now(timezone.utc) + timedelta(minutes=1)
+    world.publish_changes(
+        [
+            world.add_file("client0000-ads-new", "client0000_ads_new.csv", modified=newest),
+            world.add_file("notes", "meeting notes.csv"),  # not an export, never indexed
+        ],
+        [
+            world.rename_file("client0001-ads-prev", "client0001 archive.csv"),
+            world.trash_file("client0001-ga-cur"),
+            world.delete_file("client0000-ga-prev"),
+        ],
+    )
+    manifest.sync()
+
+    assert manifest.page_token == world.start_page_token() == "2"
+    assert ids(manifest.index["client0000_ads"]) == [
+        "client0000-ads-new", "client0000-ads-cur", "client0000-ads-prev"]
+    assert manifest.latest("client0000_ads")["id"] == "client0000-ads-new"
+    assert manifest.previous("client0000_ads")["id"] == "client0000-ads-cur"
+    assert manifest.previous("client0000_ads", exclude_id="client0000-ads-cur")["id"] == "client0000-ads-prev"
+    assert ids(manifest.index["client0001_ads"]) == ["client0001-ads-cur"]
+    assert manifest.previous("client0001_ads") is None
+    assert manifest.latest("client0001_ga")["id"] == "client0001-ga-prev"
+    assert manifest.previous("client0000_ga") is None
+    assert "notes" not in manifest.files
+
+
+def test_renaming_into_the_pattern_adds_the_file(tmp_path):
+    world = FakeWorld(clients=1, rows=5)
+    world.add_file("upload", "Untitled.csv")
+    manifest, _ = make_manifest(tmp_path, world)
+    manifest.sync()
+    assert "upload" not in manifest.files
+
+    world.publish_changes([world.rename_file("upload", "client0000_ga_july.csv")])
+    manifest.sync()
+    assert "upload" in ids(manifest.index["client0000_ga"])
+
+
+def test_index_and_token_survive_a_restart(tmp_path):
+    world = FakeWorld(clients=1, rows=5)
+    manifest, _ = make_manifest(tmp_path, world)
+    manifest.sync()
+    world.publish_changes([world.delete_file("client0000-ads-cur")])
+    manifest.sync()
+
+    reloaded, service = make_manifest(tmp_path, world)
+    assert reloaded.page_token == manifest.page_token
+    assert reloaded.latest("client0000_ads")["id"] == "client0000-ads-prev"
+    reloaded.sync()
+    # Picks up from the saved token: one changes.list call, no bootstrap listing
+    assert service.requests == 1
+
+
+def test_failed_sync_backs_off_and_keeps_the_index(tmp_path):
+    world = FakeWorld(clients=1, rows=5)
+    manifest, service = make_manifest(tmp_path, world, retry_after=60)
+    manifest.sync()
+
+    def broken():
+        raise RuntimeError("drive down")
+    manifest.get_service = broken
+    manifest.ensure_fresh()
+    manifest.ensure_fresh()
+    assert manifest.next_sync > time.monotonic() + 30
+    assert manifest.latest("client0000_ads")["id"] == "client0000-ads-cur"
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn(Path(tempfile.mkdtemp()))
+            print(f"✅ {name}")
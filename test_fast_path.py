@@ -0,0 +1,47 @@
+# File: test_fast_path.py
+
+from engine.fast_path import requested_metrics
+
+HP = ["HP Roofing", "hproofing"]
+
+
+def test_lookups_take_the_fast_path():
+    assert requested_metrics("What was HP Roofing's CPL last week?", HP) == ["cpl"]
+    assert requested_metrics("What’s hproofing’s cost per lead this week?", HP) == ["cpl"]
+    assert requested_metrics("How many leads did HP Roofing get last week?", HP) == ["total_conversions"]
+    assert requested_metrics("What's HP Roofing's current CPL?", HP) == ["cpl"]
+    assert requested_metrics("What is the conversion rate and spend for HP Roofing?", HP) == [
+        "conversion_rate", "total_cost"]
+    assert requested_metrics("Show me HP Roofing's numbers", HP) == []
+
+
+def test_advice_and_analysis_need_the_full_pipeline():
+    assert requested_metrics("What's the best way to lower hp roofing cpl?", HP) is None
+    assert requested_metrics("What's going on with HP Roofing leads?", HP) is None
+    assert requested_metrics("what was the drop in leads for HP Roofing last month?", HP) is None
+    assert requested_metrics("What is our CPL trend this year for HP Roofing?", HP) is None
+    assert requested_metrics("Why did HP Roofing's CPL go up?", HP) is None
+    assert requested_metrics("How is HP Roofing doing this week?", HP) is None
+
+
+def test_periods_beyond_the_latest_export_need_the_full_pipeline():
+    # The fast path only has the latest weekly export; it must not pass it off as another period
+    assert requested_metrics("How many leads did HP Roofing get in March?", HP) is None
+    assert requested_metrics("What was HP Roofing's spend in May?", HP) is None
+    assert requested_metrics("What was HP Roofing's CPL this month?", HP) is None
+    assert requested_metrics("What was HP Roofing's CPL last year?", HP) is None
+    assert requested_metrics("What is HP Roofing's spend ytd?", HP) is None
+    assert requested_metrics("What was HP Roofing's CPL in 2024?", HP) is None
+    assert requested_metrics("How many leads has HP Roofing got so far?", HP) is None
+
+
+def test_unknown_words_are_not_mistaken_for_the_client():
+    assert requested_metrics("What was Acme Plumbing's CPL last week?", HP) is None
+    assert requested_metrics("What was Acme Plumbing's CPL last week?", ["Acme Plumbing"]) == ["cpl"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
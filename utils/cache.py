@@ -0,0 +1,141 @@
+# File: utils/cache.py
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from utils.singleflight import SingleFlight
+from utils import instrument
+
+CACHE_DIR = os.getenv("DEXTER_CACHE_DIR", ".cache")
+
+
+class DiskCache:
+    """
+    Small persistent key/value cache backed by SQLite.
+    Entries expire after their TTL and the least recently used ones are evicted
+    once the cache holds more than `max_entries`. Values must be JSON-serializable.
+    """
+
+    def __init__(self, name, ttl=3600, max_entries=1000, path=None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path or os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._flight = SingleFlight(f"cache.{name}")
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def _conn(self):
+        # One connection per thread; SQLite handles locking across threads and processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        instrument.cache_event(self.name, value is not None)
+        return value
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl)
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            self._evict(conn, now)
+
+    def add(self, key, value, ttl=None):
+        """
+        Stores value only if the key is absent (or expired). Returns True if it was stored.
+        Atomic across threads and processes, so it can be used to claim a key exactly once.
+        """
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl)
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            added = cursor.rowcount == 1
+            if added:
+                self._evict(conn, now)
+        return added
+
+    def get_or_set(self, key, fn, ttl=None):
+        """
+        Returns the cached value, or computes it with fn() and stores it.
+        Concurrent misses for the same key share a single fn() call.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def _populate():
+            # Another caller may have filled it while we were queued
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            fresh = fn()
+            self.set(key, fresh, ttl=ttl)
+            return fresh
+
+        return self._flight.do(key, _populate)
+
+    def invalidate(self, key):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,78 @@
+# File: utils/client_registry.py
+
+import os
+import time
+import threading
+from utils.notion_utils import fetch_all_clients
+
+CLIENT_REFRESH_INTERVAL = int(os.getenv("CLIENT_REFRESH_INTERVAL", 300))
+
+
+class ClientRegistry:
+    """
+    Process-wide list of known clients ({"name": ..., "slug": ...}).
+    Loaded on first use, then refreshed on a background timer. If Notion is slow
+    or down the last good snapshot keeps being served. `version` goes up every
+    time the client list actually changes.
+    """
+
+    def __init__(self, loader=None, refresh_interval=CLIENT_REFRESH_INTERVAL):
+        self.loader = loader or (lambda: fetch_all_clients(strict=True))
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self.last_refresh = None
+        self._snapshot = []
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._thread = None
+
+    def clients(self):
+        if not self._loaded.is_set():
+            self._first_load()
+        return self._snapshot
+
+    def versioned(self):
+        """Returns (version, clients) taken together, so callers can key derived data on the version."""
+        self.clients()
+        with self._lock:
+            return self.version, self._snapshot
+
+    def refresh(self):
+        """Reloads from Notion. Returns True on success; failures keep the old snapshot."""
+        try:
+            fresh = self.loader()
+        except Exception as e:
+            print("⚠️ Client registry refresh failed, keeping last snapshot:", str(e))
+            return False
+
+        with self._lock:
+            if fresh != self._snapshot:
+                self._snapshot = fresh
+                self.version += 1
+                print(f"✅ Client registry updated to v{self.version} ({len(fresh)} clients).")
+            self.last_refresh = time.time()
+        return True
+
+    def _first_load(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="client-registry", daemon=True)
+                needs_load = True
+            else:
+                needs_load = False
+        if needs_load:
+            self.refresh()
+            self._loaded.set()
+            self._thread.start()
+        else:
+            # Another thread is doing the first load; don't scan Notion twice
+            self._loaded.wait()
+
+    def _run(self):
+        while True:
+            # Retry sooner while we have never had a good snapshot
+            time.sleep(self.refresh_interval if self.last_refresh else min(self.refresh_interval, 30))
+            self.refresh()
+
+
+CLIENTS = ClientRegistry()
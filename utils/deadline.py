@@ -0,0 +1,121 @@
+# File: utils/deadline.py
+
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils import instrument
+
+# Absolute time.monotonic() by which the current request must be done (None = no deadline)
+_deadline = contextvars.ContextVar("dexter_deadline", default=None)
+
+HEDGE_ENABLED = os.getenv("DEXTER_HEDGE", "1") == "1"
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 0.05))
+IO_WORKERS = int(os.getenv("DEXTER_IO_WORKERS", 16))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _io_executor():
+    # Created on first use, and again in a forked child: the parent's pool threads don't survive fork()
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="dexter-io")
+    return _executor
+
+
+def _reset_after_fork():
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def deadline(seconds):
+    """Gives the block at most `seconds`; an enclosing, earlier deadline still wins."""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """Seconds left on the current deadline, or None when there is none."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def timeout_for(default):
+    """Per-call timeout: `default`, shortened to what's left of the deadline. Raises once it has passed."""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return min(default, left) if default else left
+
+
+def call(name, fn, timeout=None, hedge=HEDGE_ENABLED):
+    """
+    Runs an idempotent read fn() for at most timeout_for(timeout) seconds.
+    With hedge, a second copy starts once the first has run longer than the p95
+    of the `name` latency histogram, and whichever succeeds first wins.
+    Raises DeadlineExceeded if neither finishes in time (the call itself is abandoned, not killed).
+    """
+    budget = timeout_for(timeout)
+    ctx = contextvars.copy_context()
+    started = time.monotonic()
+    futures = [_io_executor().submit(ctx.copy().run, fn)]
+
+    hedge_after = None
+    if hedge and instrument.sample_count(name) >= HEDGE_MIN_SAMPLES:
+        hedge_after = max(HEDGE_MIN_DELAY, instrument.percentiles(name).get(0.95, 0))
+
+    error = None
+    while futures:
+        elapsed = time.monotonic() - started
+        left = None if budget is None else budget - elapsed
+        if left is not None and left <= 0:
+            break
+        wait_for = left
+        if hedge_after is not None:
+            until_hedge = max(0.0, hedge_after - elapsed)
+            wait_for = until_hedge if left is None else min(left, until_hedge)
+
+        done, _ = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+        if not done:
+            if hedge_after is not None and time.monotonic() - started >= hedge_after:
+                print(f"🏇 {name} slower than its p95 ({hedge_after:.2f}s), sending a hedged request")
+                instrument.incr("dexter_hedged_requests_total", call=name)
+                futures.append(_io_executor().submit(ctx.copy().run, fn))
+                hedge_after = None
+            continue
+
+        for future in done:
+            futures.remove(future)
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+        # A failed first attempt isn't hedged, only waited out by a copy already running
+        hedge_after = None
+        if not futures:
+            raise error
+
+    instrument.incr("dexter_deadline_exceeded_total", call=name)
+    raise DeadlineExceeded(f"{name} did not finish within {budget:.1f}s")
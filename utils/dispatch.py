@@ -0,0 +1,154 @@
+# File: utils/dispatch.py
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+DISPATCH_MODE = os.getenv("DEXTER_DISPATCH_MODE", "async")  # "async" or "inline"
+POOL_KIND = os.getenv("DEXTER_POOL_KIND", "thread")  # "thread" or "process"
+POOL_WORKERS = int(os.getenv("DEXTER_POOL_WORKERS", 4))
+QUEUE_DEPTH = int(os.getenv("DEXTER_QUEUE_DEPTH", 32))
+
+
+def _timed_call(fn, *args):
+    # Runs in the child process: reports when the job actually started (wall clock, so it
+    # compares across processes) along with its result
+    return time.time(), fn(*args)
+
+
+class WorkerPool:
+    """
+    Bounded background pool for pipeline jobs.
+    At most `workers` jobs run at once and at most `queue_depth` more wait;
+    anything beyond that is rejected so Slack events can still be acked.
+    """
+
+    def __init__(self, workers=POOL_WORKERS, queue_depth=QUEUE_DEPTH, kind=POOL_KIND):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.kind = kind
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._lock = threading.Lock()
+        self._in_flight = 0  # process mode: submitted and not yet finished, waiting or running
+        self._stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "queued": 0,
+            "running": 0,
+            "max_queued": 0,
+            "waits_recorded": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="dexter-worker"
+                    )
+            return self._executor
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        """
+        Queue fn(*args) and return True, or False if the pool is full.
+        on_done(result) / on_error(exc) run in the parent process once the job finishes.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            print("⚠️ Worker pool full, rejecting job.")
+            return False
+
+        enqueued_at = time.monotonic()
+        if self.kind == "process":
+            # A child can't tell us when it starts, so until a job finishes we only know how many
+            # are in flight; the first `workers` of them are running, the rest queued (FIFO)
+            with self._lock:
+                self._stats["submitted"] += 1
+                self._in_flight += 1
+                self._sync_process_counts()
+            enqueued_wall = time.time()
+            future = self._get_executor().submit(_timed_call, fn, *args)
+        else:
+            with self._lock:
+                self._stats["submitted"] += 1
+                self._stats["queued"] += 1
+                self._stats["max_queued"] = max(self._stats["max_queued"], self._stats["queued"])
+            future = self._get_executor().submit(self._run_thread_job, enqueued_at, fn, *args)
+
+        def _finish(fut):
+            self._slots.release()
+            try:
+                result = fut.result()
+                if self.kind == "process":
+                    started_wall, result = result
+                    self._record_wait(max(0.0, started_wall - enqueued_wall))
+            except Exception as e:
+                self._job_done("failed")
+                print("❌ Background job failed:", str(e))
+                if on_error:
+                    on_error(e)
+                return
+
+            self._job_done("completed")
+            if on_done:
+                try:
+                    on_done(result)
+                except Exception as e:
+                    print("❌ Error delivering job result:", str(e))
+
+        future.add_done_callback(_finish)
+        return True
+
+    def _job_done(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+            if self.kind == "process":
+                self._in_flight -= 1
+                self._sync_process_counts()
+            else:
+                self._stats["running"] -= 1
+
+    def _sync_process_counts(self):
+        # Caller holds the lock
+        running = min(self._in_flight, self.workers)
+        self._stats["running"] = running
+        self._stats["queued"] = self._in_flight - running
+        self._stats["max_queued"] = max(self._stats["max_queued"], self._stats["queued"])
+
+    def _run_thread_job(self, enqueued_at, fn, *args):
+        self._mark_started(enqueued_at)
+        return fn(*args)
+
+    def _mark_started(self, enqueued_at):
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["running"] += 1
+        self._record_wait(time.monotonic() - enqueued_at)
+
+    def _record_wait(self, waited):
+        with self._lock:
+            self._stats["waits_recorded"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        waits = snapshot["waits_recorded"]
+        snapshot["wait_seconds_avg"] = snapshot["wait_seconds_total"] / waits if waits else 0.0
+        snapshot["workers"] = self.workers
+        snapshot["queue_depth"] = self.queue_depth
+        snapshot["kind"] = self.kind
+        return snapshot
+
+
+POOL = WorkerPool()
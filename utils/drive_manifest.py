@@ -0,0 +1,206 @@
+# File: utils/drive_manifest.py
+
+import os
+import re
+import json
+import time
+import threading
+from utils.cache import CACHE_DIR
+from utils import deadline
+
+MANIFEST_PATH = os.getenv("DRIVE_MANIFEST_PATH", os.path.join(CACHE_DIR, "drive_manifest.json"))
+MANIFEST_SYNC_INTERVAL = int(os.getenv("DRIVE_MANIFEST_SYNC_INTERVAL", 60))
+# After a failed sync, wait this long before trying again (the old index is served meanwhile)
+MANIFEST_RETRY_AFTER = int(os.getenv("DRIVE_MANIFEST_RETRY_AFTER", 30))
+
+# "<slug>_ads..." / "<slug>_ga..." — the suffix must not run into more letters (e.g. "_gadget")
+NAME_PATTERN = re.compile(r"^(?P<slug>.+?)_(?P<kind>ads|ga)(?![a-z0-9])")
+
+FILE_FIELDS = "id, name, mimeType, modifiedTime, trashed"
+
+
+def slug_key_for(name):
+    match = NAME_PATTERN.match((name or "").lower())
+    if not match:
+        return None
+    return f"{match.group('slug')}_{match.group('kind')}"
+
+
+class DriveManifest:
+    """
+    Local index of every `<slug>_ads` / `<slug>_ga` CSV in Drive.
+    Bootstrapped once with files.list, then kept current from the Drive changes
+    feed using a saved page token. Lookups are plain dict reads.
+    Every Drive call goes through deadline.call with `timeout` seconds at most.
+    """
+
+    def __init__(self, get_service, path=MANIFEST_PATH, sync_interval=MANIFEST_SYNC_INTERVAL,
+                 retry_after=MANIFEST_RETRY_AFTER, timeout=None):
+        # A factory rather than a service object: Drive clients aren't thread-safe
+        self.get_service = get_service
+        self.path = path
+        self.sync_interval = sync_interval
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.page_token = None
+        self.files = {}  # file id -> metadata
+        self.index = {}  # slug key -> [metadata, ...] newest first
+        self.last_sync = 0.0
+        self.next_sync = 0.0  # monotonic time of the next sync attempt
+        self._lock = threading.RLock()
+        self._load()
+
+    # ---- persistence ----
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self.page_token = state.get("page_token")
+        for meta in state.get("files", []):
+            self.files[meta["id"]] = meta
+        self._rebuild_index()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"page_token": self.page_token, "files": list(self.files.values())}, f)
+        os.replace(tmp_path, self.path)
+
+    # ---- syncing ----
+
+    def _execute(self, name, build):
+        # build() makes the request on the I/O thread, with that thread's own Drive service
+        return deadline.call(name, lambda: build(self.get_service()).execute(), timeout=self.timeout)
+
+    def bootstrap(self):
+        """Full listing. Grabs the start token first so nothing changed mid-listing is missed."""
+        with self._lock:
+            token = self._execute(
+                "drive.changes", lambda service: service.changes().getStartPageToken()
+            )["startPageToken"]
+            files = {}
+            page_token = None
+            while True:
+                response = self._execute("drive.list", lambda service, page_token=page_token: service.files().list(
+                    q="mimeType='text/csv' and trashed=false",
+                    spaces='drive',
+                    fields=f"nextPageToken, files({FILE_FIELDS})",
+                    pageSize=1000,
+                    pageToken=page_token
+                ))
+                for meta in response.get("files", []):
+                    if slug_key_for(meta.get("name")):
+                        files[meta["id"]] = self._slim(meta)
+                page_token = response.get("nextPageToken")
+                if not page_token:
+                    break
+
+            self.files = files
+            self.page_token = token
+            self._rebuild_index()
+            self._save()
+            self._synced()
+            print(f"✅ Drive manifest bootstrapped with {len(files)} CSVs.")
+
+    def sync(self):
+        """Applies every change since the saved page token."""
+        with self._lock:
+            if not self.page_token:
+                self.bootstrap()
+                return
+
+            token = self.page_token
+            changed = 0
+            while True:
+                response = self._execute("drive.changes", lambda service, token=token: service.changes().list(
+                    pageToken=token,
+                    spaces='drive',
+                    fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))",
+                    pageSize=1000
+                ))
+                for change in response.get("changes", []):
+                    changed += self._apply(change)
+                if "newStartPageToken" in response:
+                    token = response["newStartPageToken"]
+                    break
+                token = response["nextPageToken"]
+
+            self.page_token = token
+            if changed:
+                self._rebuild_index()
+                print(f"🔄 Drive manifest applied {changed} change(s).")
+            self._save()
+            self._synced()
+
+    def _synced(self):
+        self.last_sync = time.monotonic()
+        self.next_sync = self.last_sync + self.sync_interval
+
+    def ensure_fresh(self):
+        """
+        Syncs once `sync_interval` has passed since the last sync (`retry_after` after a failure).
+        Readers don't queue behind a sync another thread is already running: they use the
+        current index. Only the very first sync, with nothing to serve yet, is waited for.
+        """
+        if time.monotonic() < self.next_sync:
+            return
+        if not self._lock.acquire(blocking=self.page_token is None):
+            return
+        try:
+            # Another thread may have synced while we waited for the lock
+            if time.monotonic() < self.next_sync:
+                return
+            try:
+                self.sync()
+            except Exception as e:
+                self.next_sync = time.monotonic() + self.retry_after
+                print(f"⚠️ Drive manifest sync failed, serving last index for {self.retry_after}s:", str(e))
+        finally:
+            self._lock.release()
+
+    def _apply(self, change):
+        file_id = change.get("fileId")
+        meta = change.get("file")
+        keep = (
+            not change.get("removed")
+            and meta is not None
+            and not meta.get("trashed")
+            and meta.get("mimeType") == "text/csv"
+            and slug_key_for(meta.get("name"))
+        )
+        if keep:
+            self.files[file_id] = self._slim(meta)
+            return 1
+        if file_id in self.files:
+            del self.files[file_id]
+            return 1
+        return 0
+
+    @staticmethod
+    def _slim(meta):
+        return {"id": meta["id"], "name": meta["name"], "modifiedTime": meta["modifiedTime"]}
+
+    def _rebuild_index(self):
+        index = {}
+        for meta in self.files.values():
+            index.setdefault(slug_key_for(meta["name"]), []).append(meta)
+        for entries in index.values():
+            entries.sort(key=lambda m: m["modifiedTime"], reverse=True)
+        self.index = index
+
+    # ---- lookups ----
+
+    def latest(self, slug_key):
+        entries = self.index.get(slug_key.lower())
+        return entries[0] if entries else None
+
+    def previous(self, slug_key, exclude_id=None):
+        """Newest file older than the latest one, skipping `exclude_id`."""
+        for meta in self.index.get(slug_key.lower(), [])[1:]:
+            if meta["id"] != exclude_id:
+                return meta
+        return None
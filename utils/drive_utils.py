@@ -2,33 +2,139 @@
 
 import os
 import io
+import json
+import time
+import threading
 from datetime import datetime, timezone, timedelta
 import pandas as pd
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 from dateutil.parser import isoparse
 from datetime import timezone
+from utils.cache import CACHE_DIR
+from utils.frame_cache import FrameCache
+from utils.drive_manifest import DriveManifest
+from utils import instrument, deadline
 
-# Setup Google Drive Service
+# Setup Google Drive Service (lazily, on first use)
 SERVICE_ACCOUNT_FILE = "service_account.json"
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
-credentials = service_account.Credentials.from_service_account_file(
-    SERVICE_ACCOUNT_FILE, scopes=SCOPES
-)
-service = build('drive', 'v3', credentials=credentials)
+# Point at a local Drive stand-in (e.g. the bench fakes); requests then go out unauthenticated
+DRIVE_API_ENDPOINT = os.getenv("DRIVE_API_ENDPOINT")
+DISCOVERY_CACHE = os.getenv("DRIVE_DISCOVERY_CACHE", os.path.join(CACHE_DIR, "drive_v3_discovery.json"))
+
+_init_lock = threading.Lock()
+_credentials = None
+_discovery_doc = None
+_local = threading.local()
 
 FRESHNESS_DAYS = 7
 
+# Socket timeout for every Drive request, and the overall cap on one file download (both seconds)
+DRIVE_TIMEOUT = float(os.getenv("DRIVE_TIMEOUT", 30))
+DRIVE_DOWNLOAD_TIMEOUT = float(os.getenv("DRIVE_DOWNLOAD_TIMEOUT", 120))
+
+# Parsed CSVs keyed by file id + modifiedTime, so unchanged files never hit the media endpoint
+FRAME_CACHE = FrameCache()
+
+# Exports are parsed while they download: bytes per ranged media request, rows per parsed chunk
+DRIVE_DOWNLOAD_CHUNK = int(os.getenv("DRIVE_DOWNLOAD_CHUNK", 4 * 1024 * 1024))
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", 50000))
+
+# Local index of <slug>_ads / <slug>_ga CSVs synced from the Drive changes feed
+USE_MANIFEST = os.getenv("DRIVE_MANIFEST", "1") == "1"
+_manifest = None
+
+
+def _load_discovery_doc():
+    """Drive v3 discovery document, read from the local cache file or cached there on first use."""
+    try:
+        with open(DISCOVERY_CACHE) as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    from googleapiclient import discovery_cache
+    doc = discovery_cache.get_static_doc('drive', 'v3')
+    if doc is None:
+        import requests
+        doc = requests.get("https://www.googleapis.com/discovery/v1/apis/drive/v3/rest", timeout=30).text
+    json.loads(doc)  # don't cache an error page
+
+    os.makedirs(os.path.dirname(DISCOVERY_CACHE) or ".", exist_ok=True)
+    tmp_path = f"{DISCOVERY_CACHE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(doc)
+    os.replace(tmp_path, DISCOVERY_CACHE)
+    return doc
+
+
+def get_service():
+    """
+    Drive client for the current thread (googleapiclient services aren't thread-safe).
+    Credentials and the discovery document are loaded once per process.
+    """
+    global _credentials, _discovery_doc
+    service = getattr(_local, "service", None)
+    if service is not None:
+        return service
+
+    with _init_lock:
+        if _discovery_doc is None:
+            _discovery_doc = _load_discovery_doc()
+        if _credentials is None and not DRIVE_API_ENDPOINT:
+            from google.oauth2 import service_account
+            _credentials = service_account.Credentials.from_service_account_file(
+                SERVICE_ACCOUNT_FILE, scopes=SCOPES
+            )
+
+    import httplib2
+    from googleapiclient.discovery import build_from_document
+    # httplib2 has no timeout by default, so one stuck socket would hold a worker forever
+    http = httplib2.Http(timeout=DRIVE_TIMEOUT)
+    if DRIVE_API_ENDPOINT:
+        service = build_from_document(
+            _discovery_doc, http=http, client_options={"api_endpoint": DRIVE_API_ENDPOINT}
+        )
+    else:
+        from google_auth_httplib2 import AuthorizedHttp
+        service = build_from_document(_discovery_doc, http=AuthorizedHttp(_credentials, http=http))
+    _local.service = service
+    return service
+
+
+def get_manifest():
+    global _manifest
+    if not USE_MANIFEST:
+        return None
+    if _manifest is None:
+        with _init_lock:
+            if _manifest is None:
+                _manifest = DriveManifest(get_service, timeout=DRIVE_TIMEOUT)
+    return _manifest
+
+
 def get_latest_file(slug_part):
-    response = service.files().list(
-        q=f"name contains '{slug_part}' and mimeType='text/csv'",
-        spaces='drive',
-        fields='files(id, name, modifiedTime)',
-        orderBy='modifiedTime desc'
-    ).execute()
+    manifest = get_manifest()
+    if manifest is not None:
+        with instrument.span("drive.manifest_sync"):
+            manifest.ensure_fresh()
+        return manifest.latest(slug_part)
+
+    response = _list_csvs(slug_part)
     return response['files'][0] if response['files'] else None
 
+def _list_csvs(slug_key):
+    def _list():
+        with instrument.span("drive.list"):
+            return get_service().files().list(
+                q=f"name contains '{slug_key}' and mimeType='text/csv'",
+                spaces='drive',
+                fields='files(id, name, modifiedTime)',
+                orderBy='modifiedTime desc'
+            ).execute()
+    # Runs on an I/O thread (with that thread's own Drive service), hedged past its p95
+    return deadline.call("drive.list", _list, timeout=DRIVE_TIMEOUT)
+
 def is_fresh(file_metadata, days=FRESHNESS_DAYS):
     if not file_metadata:
         return False
@@ -36,15 +142,94 @@ def is_fresh(file_metadata, days=FRESHNESS_DAYS):
     now = datetime.now(timezone.utc)
     return mod_time > now - timedelta(days=days)
 
-def download_csv(file_id, skiprows=2):
-    request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done:
-        _, done = downloader.next_chunk()
-    fh.seek(0)
-    return pd.read_csv(fh, skiprows=skiprows, on_bad_lines='skip')
+class _MediaStream(io.RawIOBase):
+    """
+    Read-only file object over a Drive media download. Each read pulls the next
+    ranged chunk only when the previous one is used up, so at most one chunk of
+    raw CSV is in memory. `network_seconds` is the time spent waiting on Drive.
+    Stops with DeadlineExceeded between chunks once the deadline has passed, so an
+    abandoned download doesn't keep running on the I/O pool.
+    """
+
+    def __init__(self, request, chunksize=DRIVE_DOWNLOAD_CHUNK):
+        self._sink = io.BytesIO()
+        self._downloader = MediaIoBaseDownload(self._sink, request, chunksize=chunksize)
+        self._pending = memoryview(b"")
+        self._done = False
+        self.network_seconds = 0.0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._done:
+            left = deadline.remaining()
+            if left is not None and left <= 0:
+                raise deadline.DeadlineExceeded("Drive download abandoned after its deadline")
+            start = time.perf_counter()
+            _, self._done = self._downloader.next_chunk()
+            self.network_seconds += time.perf_counter() - start
+            self._pending = memoryview(self._sink.getvalue())
+            self._sink.seek(0)
+            self._sink.truncate()
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def download_csv(file_id, skiprows=2, modified_time=None, columns=None):
+    """
+    Downloads and parses a Drive CSV, parsing chunk by chunk as the bytes arrive.
+    `columns` ({name: parser or None}) keeps only those columns; each parser
+    (e.g. math.to_number) turns its column into float64 per chunk, the rest stay text.
+    Missing columns are simply absent from the result.
+    The download runs on an I/O thread bounded by the request deadline. It isn't hedged: one
+    p95 across every file size would always re-download the biggest exports.
+    """
+    wanted = sorted(columns) if columns else None
+    if modified_time:
+        cached = FRAME_CACHE.get(file_id, modified_time, skiprows, wanted)
+        if cached is not None:
+            return cached
+
+    def _fetch():
+        # The stream checks this deadline between chunks, so a download we stop waiting for stops too
+        with deadline.deadline(DRIVE_DOWNLOAD_TIMEOUT):
+            return _fetch_csv(file_id, skiprows, columns)
+
+    df = deadline.call("drive.fetch", _fetch, timeout=DRIVE_DOWNLOAD_TIMEOUT, hedge=False)
+
+    if modified_time:
+        FRAME_CACHE.put(df, file_id, modified_time, skiprows, wanted)
+    return df
+
+def _fetch_csv(file_id, skiprows, columns):
+    wanted = sorted(columns) if columns else None
+    stream = _MediaStream(get_service().files().get_media(fileId=file_id))
+    start = time.perf_counter()
+    options = {"skiprows": skiprows, "on_bad_lines": "skip", "chunksize": CSV_CHUNK_ROWS}
+    if columns:
+        options.update(usecols=lambda col: col in columns, dtype=str)
+
+    chunks = []
+    with pd.read_csv(io.BufferedReader(stream), **options) as reader:
+        for chunk in reader:
+            for col, parser in (columns or {}).items():
+                if parser is not None and col in chunk.columns:
+                    chunk[col] = parser(chunk[col])
+            chunks.append(chunk)
+    if len(chunks) == 1:
+        df = chunks[0]
+    elif chunks:
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=wanted or [])
+
+    instrument.observe("drive.download", stream.network_seconds)
+    instrument.observe("drive.parse", time.perf_counter() - start - stream.network_seconds)
+    instrument.observe("drive.fetch", time.perf_counter() - start)
+    return df
 
 def get_valid_csvs(slug):
     ads_file = get_latest_file(f"{slug}_ads")
@@ -56,15 +241,17 @@ def get_valid_csvs(slug):
     return ads_file, ga_file
 
 def get_previous_csvs(slug, exclude_id=None):
+    manifest = get_manifest()
+    if manifest is not None:
+        with instrument.span("drive.manifest_sync"):
+            manifest.ensure_fresh()
+        return manifest.previous(f"{slug}_ads", exclude_id), manifest.previous(f"{slug}_ga", exclude_id)
+
     def get_previous(slug_key):
-        response = service.files().list(
-            q=f"name contains '{slug_key}' and mimeType='text/csv'",
-            spaces='drive',
-            fields='files(id, name, modifiedTime)',
-            orderBy='modifiedTime desc'
-        ).execute()
-
-        files = response['files']
+        response = _list_csvs(slug_key)
+
+        # Skip the newest file of this kind; it's the "current" one
+        files = response['files'][1:]
         for f in files:
             if f['id'] != exclude_id:
                 return f
@@ -0,0 +1,94 @@
+# File: utils/frame_cache.py
+
+import os
+import hashlib
+import threading
+import pandas as pd
+from utils.cache import CACHE_DIR
+from utils import instrument
+
+FRAME_CACHE_DIR = os.getenv("FRAME_CACHE_DIR", os.path.join(CACHE_DIR, "frames"))
+FRAME_CACHE_MAX_BYTES = int(os.getenv("FRAME_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+class FrameCache:
+    """
+    On-disk cache of parsed DataFrames stored as Parquet.
+    Keys are content addresses (Drive file id + modifiedTime), so an entry never
+    goes stale; the least recently used files are evicted once the total size
+    passes `max_bytes`.
+    """
+
+    def __init__(self, directory=FRAME_CACHE_DIR, max_bytes=FRAME_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, *parts):
+        digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.parquet")
+
+    def get(self, *parts):
+        path = self._path(*parts)
+        try:
+            df = pd.read_parquet(path)
+        except (FileNotFoundError, OSError, ValueError):
+            self.misses += 1
+            instrument.cache_event("drive_frames", False)
+            return None
+        # Touch the file so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        instrument.cache_event("drive_frames", True)
+        return df
+
+    def put(self, df, *parts):
+        path = self._path(*parts)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Some exports have mixed-type columns Parquet can't store; just skip caching them
+            print("⚠️ Could not cache frame:", str(e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".parquet"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,109 @@
+# File: utils/history_store.py
+
+import os
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+from utils.cache import CACHE_DIR
+
+HISTORY_DIR = os.getenv("HISTORY_DIR", os.path.join(CACHE_DIR, "history"))
+
+# period=YYYY-MM-DD partitions, compared as strings (ISO dates sort correctly)
+PARTITIONING = ds.partitioning(pa.schema([("period", pa.string())]), flavor="hive")
+
+# Parquet footer key holding the export's full Drive modifiedTime (orders same-day exports)
+MODIFIED_KEY = b"dexter.modified_time"
+
+_lock = threading.Lock()
+
+
+def _kind_dir(slug, kind):
+    return os.path.join(HISTORY_DIR, slug, kind)
+
+
+def ingest(slug, kind, file_meta, df):
+    """
+    Appends one Drive export to <slug>/<kind>/period=<modified date>/<file id>.parquet,
+    with its full modifiedTime in the file's metadata.
+    Idempotent per Drive file id. Returns True when something new was written.
+    """
+    period = file_meta["modifiedTime"][:10]
+    directory = os.path.join(_kind_dir(slug, kind), f"period={period}")
+    path = os.path.join(directory, f"{file_meta['id']}.parquet")
+    if os.path.exists(path):
+        return False
+
+    # One stable schema across exports: numbers as float64, everything else as text
+    normalized = df.copy()
+    for col in normalized.columns:
+        if pd.api.types.is_numeric_dtype(normalized[col]):
+            normalized[col] = normalized[col].astype("float64")
+        else:
+            normalized[col] = normalized[col].astype("string")
+
+    with _lock:
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        table = pa.Table.from_pandas(normalized, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}), MODIFIED_KEY: file_meta["modifiedTime"].encode()
+        })
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    print(f"🗄️ Ingested {kind} export {file_meta['id']} for {slug} ({period}).")
+    return True
+
+
+def scan(slug, kind, columns=None, start=None, end=None):
+    """
+    Reads a client's history for one source. Only `columns` (plus "period", "export"
+    and "modified_time") are loaded and only partitions within [start, end]
+    (YYYY-MM-DD strings) are touched. Columns that only some exports have are
+    null in the others. "export" is the Drive file id, so same-day exports stay apart.
+    Files are memory-mapped, so Arrow buffers come straight from the page cache.
+    Returns None when nothing has been ingested for this slug/kind yet.
+    """
+    directory = _kind_dir(slug, kind)
+    if not os.path.isdir(directory):
+        return None
+
+    dataset = ds.dataset(
+        directory,
+        format="parquet",
+        partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+    condition = None
+    if start:
+        condition = ds.field("period") >= start
+    if end:
+        upper = ds.field("period") <= end
+        condition = upper if condition is None else condition & upper
+    fragments = list(dataset.get_fragments(filter=condition))
+
+    # The first file's schema alone would drop columns added to later exports (e.g. Clicks)
+    schema = pa.unify_schemas(
+        [fragment.physical_schema.remove_metadata() for fragment in fragments] or [pa.schema([])],
+        promote_options="permissive",
+    )
+    if columns is not None:
+        columns = [c for c in columns if c in schema.names]
+
+    tables = []
+    for fragment in fragments:
+        table = fragment.to_table(schema=schema, columns=columns)
+        period = ds.get_partition_keys(fragment.partition_expression)["period"]
+        modified = (fragment.physical_schema.metadata or {}).get(MODIFIED_KEY, period.encode()).decode()
+        export = os.path.splitext(os.path.basename(fragment.path))[0]
+        for name, value in (("period", period), ("export", export), ("modified_time", modified)):
+            table = table.append_column(name, pa.array([value] * table.num_rows, pa.string()))
+        tables.append(table)
+
+    if not tables:
+        names = (columns if columns is not None else schema.names) + ["period", "export", "modified_time"]
+        return pd.DataFrame(columns=names)
+    return pa.concat_tables(tables).to_pandas(split_blocks=True, self_destruct=True)
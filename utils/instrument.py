@@ -0,0 +1,254 @@
+# File: utils/instrument.py
+
+import os
+import glob
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, sized for anything from a cache hit to a slow GPT-4 call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+SAMPLE_WINDOW = 2048
+
+# Every web worker process keeps its own metrics in memory and publishes them here as
+# <pid>.prom, so a scrape landing on any worker can report all of them (labelled worker="<pid>")
+METRICS_DIR = os.getenv("DEXTER_METRICS_DIR", os.path.join(os.getenv("DEXTER_CACHE_DIR", ".cache"), "metrics"))
+METRICS_PUBLISH_INTERVAL = float(os.getenv("METRICS_PUBLISH_INTERVAL", 10))
+
+_lock = threading.Lock()
+_histograms = {}  # span name -> {"buckets": [...], "count", "sum", "samples"}
+_counters = {}  # (metric, label tuple) -> value
+_gauges = {}  # name -> callable returning {label tuple: value}
+
+
+def observe(name, seconds):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = {
+                "buckets": [0] * len(BUCKETS),
+                "count": 0,
+                "sum": 0.0,
+                "samples": deque(maxlen=SAMPLE_WINDOW),
+            }
+        index = bisect_left(BUCKETS, seconds)
+        if index < len(BUCKETS):
+            hist["buckets"][index] += 1
+        hist["count"] += 1
+        hist["sum"] += seconds
+        hist["samples"].append(seconds)
+
+
+@contextmanager
+def span(name):
+    """Times the block and records it in the `name` latency histogram (errors included)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def incr(metric, amount=1, **labels):
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def cache_event(cache, hit):
+    incr("dexter_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def record_usage(stage, model, usage):
+    """Adds an OpenAI response's token usage to the per-stage counters."""
+    if usage is None:
+        return
+    incr("dexter_llm_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, stage=stage, model=model, kind="prompt")
+    incr("dexter_llm_tokens_total", getattr(usage, "completion_tokens", 0) or 0, stage=stage, model=model, kind="completion")
+
+
+def register_gauge(name, fn):
+    """fn() -> {labels dict as tuple of pairs: value}; read at scrape time."""
+    with _lock:
+        _gauges[name] = fn
+
+
+def sample_count(name):
+    with _lock:
+        hist = _histograms.get(name)
+        return hist["count"] if hist else 0
+
+
+def percentiles(name, points=(0.5, 0.95, 0.99)):
+    with _lock:
+        hist = _histograms.get(name)
+        samples = sorted(hist["samples"]) if hist else []
+    if not samples:
+        return {}
+    return {p: samples[min(len(samples) - 1, int(p * len(samples)))] for p in points}
+
+
+def snapshot():
+    """Per-span count / mean / p50 / p95 / p99 in seconds."""
+    with _lock:
+        names = list(_histograms)
+    out = {}
+    for name in names:
+        with _lock:
+            count = _histograms[name]["count"]
+            total = _histograms[name]["sum"]
+        pct = percentiles(name)
+        out[name] = {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "p50": pct.get(0.5),
+            "p95": pct.get(0.95),
+            "p99": pct.get(0.99),
+        }
+    return out
+
+
+def reset():
+    """Forgets all histograms and counters (gauges stay registered). Used between benchmark runs."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _labels(pairs, worker=None):
+    if worker is not None:
+        pairs = (("worker", worker),) + tuple(pairs or ())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render_prometheus(worker=None):
+    """
+    Everything this process recorded so far in the Prometheus text exposition format.
+    With `worker`, every sample also carries a worker="<worker>" label.
+    """
+    w = f'worker="{worker}",' if worker is not None else ""
+    lines = []
+    with _lock:
+        histograms = {name: (list(h["buckets"]), h["count"], h["sum"]) for name, h in _histograms.items()}
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+
+    lines.append("# TYPE dexter_span_seconds histogram")
+    for name, (buckets, count, total) in sorted(histograms.items()):
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, buckets):
+            cumulative += hits
+            lines.append(f'dexter_span_seconds_bucket{{{w}span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'dexter_span_seconds_bucket{{{w}span="{name}",le="+Inf"}} {count}')
+        lines.append(f'dexter_span_seconds_sum{{{w}span="{name}"}} {total}')
+        lines.append(f'dexter_span_seconds_count{{{w}span="{name}"}} {count}')
+
+    seen = set()
+    for (metric, labels), value in sorted(counters.items()):
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        lines.append(f"{metric}{_labels(labels, worker)} {value}")
+
+    for name, fn in sorted(gauges.items()):
+        try:
+            values = fn()
+        except Exception as e:
+            print(f"⚠️ Gauge {name} failed:", str(e))
+            continue
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in values.items():
+            lines.append(f"{name}{_labels(labels, worker)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ---- cross-process view ----
+
+def _worker_path(pid):
+    return os.path.join(METRICS_DIR, f"{pid}.prom")
+
+
+def publish():
+    """Writes this process's metrics (labelled with its pid) for the other workers to serve."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    pid = os.getpid()
+    tmp_path = f"{_worker_path(pid)}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus(worker=pid))
+    os.replace(tmp_path, _worker_path(pid))
+
+
+def forget_worker(pid):
+    """Drops an exited worker's published metrics (called from gunicorn's child_exit hook)."""
+    try:
+        os.remove(_worker_path(pid))
+    except FileNotFoundError:
+        pass
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def render_all_workers():
+    """
+    Every live worker's metrics as one exposition: this process's are rendered fresh,
+    the others' are their last publish (at most METRICS_PUBLISH_INTERVAL old).
+    Samples are grouped per metric family, each with a single # TYPE line.
+    """
+    publish()
+    families = {}  # name -> [type line, samples...], in first-seen order
+    for path in sorted(glob.glob(os.path.join(METRICS_DIR, "*.prom"))):
+        try:
+            pid = int(os.path.basename(path)[:-len(".prom")])
+        except ValueError:
+            continue
+        if not _alive(pid):
+            forget_worker(pid)
+            continue
+        try:
+            with open(path) as f:
+                text = f.read()
+        except FileNotFoundError:
+            continue
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# TYPE "):
+                family = line.split()[2]
+                families.setdefault(family, [line])
+            elif line and family is not None:
+                families[family].append(line)
+    return "\n".join(line for lines in families.values() for line in lines) + "\n"
+
+
+_publisher = None
+
+
+def start_publisher(interval=METRICS_PUBLISH_INTERVAL):
+    """Publishes this process's metrics every `interval` seconds on a daemon thread."""
+    global _publisher
+    if _publisher is not None and _publisher[0] == os.getpid():
+        return
+
+    def _run():
+        while True:
+            try:
+                publish()
+            except Exception as e:
+                print("⚠️ Could not publish metrics:", str(e))
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_run, name="dexter-metrics", daemon=True)
+    _publisher = (os.getpid(), thread)
+    thread.start()
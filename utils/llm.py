@@ -0,0 +1,164 @@
+# File: utils/llm.py
+
+import os
+import time
+import random
+import threading
+from dotenv import load_dotenv
+from utils import instrument, deadline
+from utils.model_router import ROUTER
+from utils.llm_gateway import GATEWAY, estimate_tokens
+
+load_dotenv()
+
+# Backoff for calls throttled on every model they could use
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 1.0))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 30.0))
+# Per-request timeout (seconds), further shortened by the caller's deadline
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """One shared OpenAI client, created on first use instead of at import."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def chat(stage, messages, model=None, **kwargs):
+    """
+    Single entry point for chat completions. `stage` names the calling pipeline
+    step (nlu, trends, strategy, pr, answer). Returns the raw OpenAI response,
+    or the chunk iterator when stream=True. Latency and token usage are recorded per stage.
+    Without an explicit model the router picks one for the stage and fails over
+    to a faster tier when the chosen model is throttled.
+    Every call is admitted through the shared gateway (concurrency, tokens/minute,
+    priority lane); throttled calls back off and retry instead of failing.
+    """
+    models = [model] if model else _route(stage)
+    if kwargs.get("stream"):
+        kwargs.setdefault("stream_options", {"include_usage": True})
+        return _timed_stream(stage, models, messages, kwargs)
+
+    estimate = estimate_tokens(messages, kwargs)
+    attempts = _Attempts(stage, models)
+    for candidate, final in attempts:
+        start = None
+        try:
+            with instrument.span(f"llm.{stage}"), GATEWAY.slot(estimate) as slot:
+                # Timed from admission: queueing in the gateway isn't the model's latency
+                start = time.perf_counter()
+                response = _create(candidate, messages, kwargs, final)
+                slot.used(getattr(response, "usage", None))
+        except Exception as e:
+            _model_failed(stage, candidate, start, e)
+            if not attempts.throttled(candidate, e) or final:
+                raise
+            continue
+        ROUTER.record(stage, candidate, time.perf_counter() - start)
+        instrument.record_usage(stage, candidate, getattr(response, "usage", None))
+        return response
+
+
+def _model_failed(stage, model, start, error):
+    """Reports a timeout, connection error or 5xx to the router; 429s and our own errors don't count."""
+    from openai import APIConnectionError, InternalServerError
+    if start is None or not isinstance(error, (APIConnectionError, InternalServerError)):
+        return
+    print(f"🐌 {model} failed for {stage} after {time.perf_counter() - start:.1f}s:", type(error).__name__)
+    ROUTER.failed(stage, model, time.perf_counter() - start)
+
+
+def _route(stage):
+    chosen = ROUTER.choose(stage)
+    candidates = ROUTER.candidates(stage)
+    return candidates[candidates.index(chosen):]
+
+
+def _create(model, messages, kwargs, final):
+    client = get_client()
+    if not final:
+        # We fail over / back off ourselves, outside the gateway slot, instead of the client retrying inside it
+        client = client.with_options(max_retries=0)
+    return client.chat.completions.create(
+        model=model, messages=messages, timeout=deadline.timeout_for(LLM_TIMEOUT), **kwargs
+    )
+
+
+class _Attempts:
+    """
+    Yields (model, final) for each try: every routed model once, failing over
+    on a 429, then the last (fastest) one again with exponential backoff.
+    """
+
+    def __init__(self, stage, models):
+        self.stage = stage
+        self.models = models
+        self.retry_after = None
+
+    def __iter__(self):
+        for model in self.models[:-1]:
+            yield model, False
+        model = self.models[-1]
+        for retry in range(LLM_MAX_RETRIES + 1):
+            if retry:
+                backoff = max(self.retry_after or 0, LLM_BACKOFF_BASE * 2 ** (retry - 1))
+                delay = min(LLM_BACKOFF_MAX, backoff) * random.uniform(0.8, 1.2)
+                left = deadline.remaining()
+                if left is not None and left < delay:
+                    raise deadline.DeadlineExceeded(f"no time left to retry throttled {self.stage} call")
+                print(f"⏳ {model} throttled, retrying {self.stage} in {delay:.1f}s")
+                time.sleep(delay)
+            yield model, retry == LLM_MAX_RETRIES
+
+    def throttled(self, model, error):
+        """True (after noting it) if `error` is a 429, i.e. worth another attempt."""
+        from openai import RateLimitError
+        if not isinstance(error, RateLimitError):
+            return False
+        retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+        try:
+            self.retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            self.retry_after = None
+        ROUTER.throttled(model, self.retry_after)
+        instrument.incr("dexter_llm_throttled_total", stage=self.stage, model=model)
+        return True
+
+
+def _timed_stream(stage, models, messages, kwargs):
+    started = time.perf_counter()
+    estimate = estimate_tokens(messages, kwargs)
+    attempts = _Attempts(stage, models)
+    try:
+        for model, final in attempts:
+            streamed = False
+            start = None
+            try:
+                with GATEWAY.slot(estimate) as slot:
+                    start = time.perf_counter()
+                    for chunk in _create(model, messages, kwargs, final):
+                        # With include_usage the final chunk carries the totals and no choices
+                        if getattr(chunk, "usage", None) is not None:
+                            instrument.record_usage(stage, model, chunk.usage)
+                            slot.used(chunk.usage)
+                        streamed = True
+                        yield chunk
+            except Exception as e:
+                _model_failed(stage, model, start, e)
+                # Only a request that never produced output can be retried
+                if streamed or not attempts.throttled(model, e) or final:
+                    raise
+                continue
+            ROUTER.record(stage, model, time.perf_counter() - start)
+            return
+    finally:
+        instrument.observe(f"llm.{stage}", time.perf_counter() - started)
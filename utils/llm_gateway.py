@@ -0,0 +1,172 @@
+# File: utils/llm_gateway.py
+
+import os
+import time
+import heapq
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from utils import instrument, deadline
+
+# Priority lanes, lower goes first. Interactive is the default; warm-up and batch jobs opt out.
+LANES = {"interactive": 0, "background": 1}
+_lane = contextvars.ContextVar("dexter_llm_lane", default="interactive")
+
+LLM_CONCURRENCY_START = float(os.getenv("LLM_CONCURRENCY_START", 8))
+LLM_CONCURRENCY_MIN = float(os.getenv("LLM_CONCURRENCY_MIN", 1))
+LLM_CONCURRENCY_MAX = float(os.getenv("LLM_CONCURRENCY_MAX", 32))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 150000))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 120))
+# Completion size assumed when a call doesn't set max_tokens; corrected from the real usage afterwards
+LLM_COMPLETION_ESTIMATE = int(os.getenv("LLM_COMPLETION_ESTIMATE", 600))
+
+
+@contextmanager
+def priority(lane):
+    """Runs the block's LLM calls in `lane` ("interactive" or "background")."""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane():
+    return _lane.get()
+
+
+def estimate_tokens(messages, kwargs):
+    """Rough prompt + completion tokens for a call (4 characters per token)."""
+    prompt = sum(len(str(m.get("content", ""))) for m in messages) // 4
+    return prompt + int(kwargs.get("max_tokens") or LLM_COMPLETION_ESTIMATE)
+
+
+class GatewayTimeout(deadline.DeadlineExceeded):
+    pass
+
+
+class _Slot:
+    def __init__(self, gateway, tokens):
+        self.gateway = gateway
+        self.tokens = tokens
+        self.actual = None
+
+    def used(self, usage):
+        """Reports the call's real token usage so the bucket can be corrected."""
+        if usage is not None:
+            self.actual = getattr(usage, "total_tokens", None)
+
+
+class LLMGateway:
+    """
+    One shared admission point for every OpenAI call in the process.
+      - AIMD concurrency: the in-flight limit grows by 1/limit per success and
+        halves on a 429 (at most once a second, so one burst doesn't collapse it).
+      - Token bucket of `tokens_per_minute`, charged with an estimate up front and
+        corrected with the real usage afterwards.
+      - Priority lanes: waiting calls are admitted lowest lane first, then FIFO.
+    """
+
+    def __init__(self, start=LLM_CONCURRENCY_START, minimum=LLM_CONCURRENCY_MIN,
+                 maximum=LLM_CONCURRENCY_MAX, tokens_per_minute=LLM_TOKENS_PER_MINUTE):
+        self.limit = start
+        self.minimum = minimum
+        self.maximum = maximum
+        self.capacity = float(tokens_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.in_flight = 0
+        self._refilled_at = time.monotonic()
+        self._last_decrease = 0.0
+        self._queue = []  # heap of (lane rank, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {"admitted": 0, "throttled": 0, "timeouts": 0, "queue_seconds_total": 0.0}
+
+    def _refill(self, now):
+        # Caller holds the lock
+        self.tokens = min(self.capacity, self.tokens + (now - self._refilled_at) * self.capacity / 60)
+        self._refilled_at = now
+
+    @contextmanager
+    def slot(self, tokens, lane=None):
+        """Waits for admission, yields a _Slot, then releases it (noting 429s and real usage)."""
+        slot = self._acquire(tokens, lane or current_lane())
+        throttled = False
+        try:
+            yield slot
+        except Exception as e:
+            throttled = getattr(e, "status_code", None) == 429
+            raise
+        finally:
+            self._release(slot, throttled)
+
+    def _acquire(self, tokens, lane):
+        # A single call bigger than the whole bucket would wait forever; cap what it reserves
+        tokens = min(tokens, self.capacity)
+        max_wait = deadline.timeout_for(LLM_QUEUE_TIMEOUT)
+        entry = (LANES.get(lane, 0), next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._queue[0] == entry and self.in_flight < int(self.limit):
+                        if self.tokens >= tokens:
+                            break
+                        wait = (tokens - self.tokens) * 60 / self.capacity
+                    else:
+                        wait = None
+                    if now - start > max_wait:
+                        self._stats["timeouts"] += 1
+                        raise GatewayTimeout(f"LLM call waited over {max_wait:.0f}s for capacity")
+                    self._cond.wait(timeout=min(wait or 1.0, 1.0))
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+            self.in_flight += 1
+            self.tokens -= tokens
+            self._stats["admitted"] += 1
+            self._stats["queue_seconds_total"] += time.monotonic() - start
+        instrument.observe(f"llm.queue.{lane}", time.monotonic() - start)
+        return _Slot(self, tokens)
+
+    def _release(self, slot, throttled):
+        with self._cond:
+            self.in_flight -= 1
+            if slot.actual is not None:
+                # Settle the estimate against what the call really used
+                self.tokens -= slot.actual - slot.tokens
+            now = time.monotonic()
+            if throttled:
+                self._stats["throttled"] += 1
+                if now - self._last_decrease > 1.0:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    print(f"🚦 OpenAI throttled, LLM concurrency limit now {self.limit:.1f}")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                **self._stats,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": len(self._queue),
+                "tokens_available": round(self.tokens),
+            }
+
+
+GATEWAY = LLMGateway()
+
+instrument.register_gauge(
+    "dexter_llm_gateway",
+    lambda: {(("stat", k),): v for k, v in GATEWAY.stats().items()}
+)
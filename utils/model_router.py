@@ -0,0 +1,117 @@
+# File: utils/model_router.py
+
+import os
+import time
+import threading
+from collections import deque
+from utils import instrument
+
+# Quality tiers, fastest first. Each stage names the best tier it wants and how long it may take.
+TIERS = [
+    ("fast", os.getenv("DEXTER_MODEL_FAST", "gpt-4o-mini")),
+    ("balanced", os.getenv("DEXTER_MODEL_BALANCED", "gpt-4o")),
+    ("flagship", os.getenv("DEXTER_MODEL_FLAGSHIP", "gpt-4")),
+]
+
+# stage -> (tier, latency budget in seconds); override with DEXTER_ROUTE_<STAGE>="tier:seconds"
+ROUTES = {
+    "nlu": ("fast", 3),
+    "pr": ("fast", 6),
+    "trends": ("balanced", 15),
+    "strategy": ("flagship", 20),
+    "answer": ("flagship", 20),
+}
+DEFAULT_ROUTE = ("flagship", 30)
+
+ROUTER_WINDOW_SECONDS = int(os.getenv("ROUTER_WINDOW_SECONDS", 300))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", 5))
+ROUTER_THROTTLE_COOLDOWN = float(os.getenv("ROUTER_THROTTLE_COOLDOWN", 30))
+
+
+def _route_for(stage):
+    override = os.getenv(f"DEXTER_ROUTE_{stage.upper()}")
+    if override:
+        tier, _, budget = override.partition(":")
+        return tier, float(budget or DEFAULT_ROUTE[1])
+    return ROUTES.get(stage, DEFAULT_ROUTE)
+
+
+class ModelRouter:
+    """
+    Picks the model for each LLM stage. A stage gets its declared tier unless that
+    model's recent p90 latency for the stage is over budget or it was throttled
+    (429) in the last ROUTER_THROTTLE_COOLDOWN seconds; then the next faster tier is tried.
+    Latency samples age out after ROUTER_WINDOW_SECONDS, so a recovered model is picked again.
+    A call that timed out or failed on the model's side counts as twice the stage's budget,
+    so a hung model is routed around instead of never producing a sample.
+    """
+
+    def __init__(self, tiers=TIERS):
+        self.tiers = tiers
+        self._latency = {}  # (stage, model) -> deque of (time, seconds)
+        self._throttled_until = {}  # model -> monotonic deadline
+        self._lock = threading.Lock()
+
+    def candidates(self, stage):
+        """Models to try for a stage, best first: the preferred tier and every faster one."""
+        tier, _ = _route_for(stage)
+        names = [name for name, _ in self.tiers]
+        top = names.index(tier) if tier in names else len(names) - 1
+        return [model for _, model in reversed(self.tiers[:top + 1])]
+
+    def choose(self, stage):
+        _, budget = _route_for(stage)
+        candidates = self.candidates(stage)
+        for model in candidates:
+            if self.healthy(stage, model, budget):
+                return model
+        # Everything is slow or throttled: the fastest tier is the least bad option
+        return candidates[-1]
+
+    def healthy(self, stage, model, budget):
+        now = time.monotonic()
+        with self._lock:
+            if self._throttled_until.get(model, 0) > now:
+                return False
+            samples = self._window(stage, model, now)
+            if len(samples) < ROUTER_MIN_SAMPLES:
+                return True
+            recent = sorted(secs for _, secs in samples)
+        return recent[int(0.9 * (len(recent) - 1))] <= budget
+
+    def _window(self, stage, model, now):
+        # Caller holds the lock
+        samples = self._latency.setdefault((stage, model), deque(maxlen=200))
+        while samples and samples[0][0] < now - ROUTER_WINDOW_SECONDS:
+            samples.popleft()
+        return samples
+
+    def record(self, stage, model, seconds):
+        with self._lock:
+            self._window(stage, model, time.monotonic()).append((time.monotonic(), seconds))
+
+    def failed(self, stage, model, seconds):
+        _, budget = _route_for(stage)
+        self.record(stage, model, max(seconds, 2 * budget))
+        instrument.incr("dexter_llm_failures_total", stage=stage, model=model)
+
+    def throttled(self, model, retry_after=None):
+        cooldown = retry_after if retry_after else ROUTER_THROTTLE_COOLDOWN
+        with self._lock:
+            self._throttled_until[model] = time.monotonic() + cooldown
+        print(f"🐢 {model} throttled, routing around it for {cooldown:.0f}s")
+
+    def stats(self):
+        now = time.monotonic()
+        out = {}
+        with self._lock:
+            for (stage, model), samples in self._latency.items():
+                recent = sorted(secs for t, secs in samples if t >= now - ROUTER_WINDOW_SECONDS)
+                if recent:
+                    out[(("stage", stage), ("model", model))] = recent[len(recent) // 2]
+        return out
+
+
+ROUTER = ModelRouter()
+
+instrument.register_gauge("dexter_model_latency_p50_seconds", ROUTER.stats)
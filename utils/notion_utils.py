@@ -1,43 +1,44 @@
 import os
+import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from utils import instrument
+from utils.singleflight import SingleFlight
+from utils import deadline
 
 load_dotenv()
 
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
 NOTION_DB_ID = os.getenv("NOTION_DB_ID")
+NOTION_API_URL = os.getenv("NOTION_API_URL", "https://api.notion.com/v1")
 HEADERS = {
     "Authorization": f"Bearer {NOTION_API_KEY}",
     "Notion-Version": "2022-06-28",
     "Content-Type": "application/json"
 }
 
+# One pooled keep-alive session instead of a fresh TLS handshake per call
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
 
-def get_client_properties_from_notion(slug):
-    """Fetch properties for a specific client by slug."""
-    url = f"https://api.notion.com/v1/databases/{NOTION_DB_ID}/query"
+# slug -> parsed properties, filled by every full database scan in fetch_all_clients()
+NOTION_PROPERTIES_TTL = int(os.getenv("NOTION_PROPERTIES_TTL", 600))
+CLIENT_PROPERTIES = {}  # keyed by lowercased slug
+_properties_lock = threading.Lock()
+_properties_loaded_at = 0.0
 
-    payload = {
-        "filter": {
-            "property": "Slug",
-            "rich_text": {
-                "equals": slug
-            }
-        }
-    }
+# Per-request timeout (seconds), further shortened by the caller's deadline
+NOTION_TIMEOUT = float(os.getenv("NOTION_TIMEOUT", 10))
 
-    response = requests.post(url, headers=HEADERS, json=payload)
+# Concurrent lookups for the same client (or concurrent full scans) share one request
+_NOTION_FLIGHT = SingleFlight("notion")
 
-    if response.status_code != 200:
-        print("⚠️ Notion query failed:", response.status_code, response.text)
-        return {}
 
-    results = response.json().get("results")
-    if not results:
-        print("⚠️ No Notion results for slug:", slug)
-        return {}
-
-    props_raw = results[0]["properties"]
+def parse_properties(props_raw):
+    """Flattens a Notion page's properties into {normalized_key: value}."""
     props = {}
 
     for key, val in props_raw.items():
@@ -55,14 +56,79 @@ def get_client_properties_from_notion(slug):
         except Exception as e:
             print(f"⚠️ Error parsing property {key}: {e}")
 
+    return props
+
+
+def get_client_properties_from_notion(slug):
+    """
+    Fetch properties for a specific client by slug.
+    Served from the bulk map when the last full scan is recent enough.
+    """
+    with _properties_lock:
+        fresh = time.time() - _properties_loaded_at < NOTION_PROPERTIES_TTL
+        cached = CLIENT_PROPERTIES.get(slug.lower())
+    instrument.cache_event("notion_properties", fresh and cached is not None)
+    if fresh and cached is not None:
+        return dict(cached)
+
+    return dict(_NOTION_FLIGHT.do(("client", slug.lower()), lambda: _query_client_properties(slug)))
+
+
+def _post(span, url, payload):
+    with instrument.span(span):
+        return SESSION.post(url, json=payload, timeout=deadline.timeout_for(NOTION_TIMEOUT))
+
+
+def _query_client_properties(slug):
+    url = f"{NOTION_API_URL}/databases/{NOTION_DB_ID}/query"
+
+    payload = {
+        "filter": {
+            "property": "Slug",
+            "rich_text": {
+                "equals": slug
+            }
+        }
+    }
+
+    try:
+        # Idempotent read: bounded by the deadline and hedged once it's slower than usual
+        response = deadline.call("notion.query", lambda: _post("notion.query", url, payload), timeout=NOTION_TIMEOUT)
+    except (requests.RequestException, deadline.DeadlineExceeded) as e:
+        print("⚠️ Notion query timed out or failed:", str(e))
+        return {}
+
+    if response.status_code != 200:
+        print("⚠️ Notion query failed:", response.status_code, response.text)
+        return {}
+
+    results = response.json().get("results")
+    if not results:
+        print("⚠️ No Notion results for slug:", slug)
+        return {}
+
+    props = parse_properties(results[0]["properties"])
     print("✅ Parsed Notion properties:", props)
+    with _properties_lock:
+        CLIENT_PROPERTIES[slug.lower()] = props
     return props
 
 
-def fetch_all_clients():
-    url = f"https://api.notion.com/v1/databases/{NOTION_DB_ID}/query"
+def fetch_all_clients(strict=False):
+    """
+    Pages through the whole client database.
+    Every client's properties are parsed on the way and stored in CLIENT_PROPERTIES.
+    With strict=True a failed request raises instead of returning [].
+    """
+    return _NOTION_FLIGHT.do(("all", strict), lambda: _fetch_all_clients(strict))
+
+
+def _fetch_all_clients(strict):
+    global _properties_loaded_at
+    url = f"{NOTION_API_URL}/databases/{NOTION_DB_ID}/query"
 
     all_clients = []
+    all_properties = {}
     has_more = True
     next_cursor = None
 
@@ -71,9 +137,18 @@ def fetch_all_clients():
         if next_cursor:
             payload["start_cursor"] = next_cursor
 
-        response = requests.post(url, headers=HEADERS, json=payload)
+        try:
+            response = deadline.call("notion.scan_page", lambda body=payload: _post("notion.scan_page", url, body),
+                                     timeout=NOTION_TIMEOUT)
+        except (requests.RequestException, deadline.DeadlineExceeded) as e:
+            print("⚠️ Notion scan timed out or failed:", str(e))
+            if strict:
+                raise RuntimeError(f"Notion query failed: {e}")
+            return []
         if response.status_code != 200:
             print("⚠️ Failed to fetch all clients from Notion:", response.status_code)
+            if strict:
+                raise RuntimeError(f"Notion query failed with status {response.status_code}")
             return []
 
         data = response.json()
@@ -90,7 +165,16 @@ def fetch_all_clients():
                     print(f"⚠️ Missing or invalid Name/Slug in result: {result['id']}")
                     continue
 
-                all_clients.append({"name": name.lower(), "slug": slug.lower()})
+                # Optional comma-separated "Aliases" column for alternate spellings
+                aliases_raw = props.get("Aliases", {}).get("rich_text", [])
+                aliases = "".join(t["plain_text"] for t in aliases_raw).split(",") if aliases_raw else []
+
+                all_clients.append({
+                    "name": name.lower(),
+                    "slug": slug.lower(),
+                    "aliases": [a.strip().lower() for a in aliases if a.strip()]
+                })
+                all_properties[slug.lower()] = parse_properties(props)
 
             except Exception as e:
                 print("⚠️ Error parsing Notion client row:", e)
@@ -98,6 +182,11 @@ def fetch_all_clients():
         has_more = data.get("has_more", False)
         next_cursor = data.get("next_cursor", None)
 
+    with _properties_lock:
+        CLIENT_PROPERTIES.clear()
+        CLIENT_PROPERTIES.update(all_properties)
+        _properties_loaded_at = time.time()
+
     print(f"✅ Loaded {len(all_clients)} clients from Notion.")
     print("Clients:", all_clients)
     return all_clients
@@ -0,0 +1,93 @@
+# File: utils/singleflight.py
+
+import threading
+from utils import instrument, deadline, llm_gateway
+
+_registry = {}  # name -> SingleFlight, reported by the dexter_singleflight gauge
+_registry_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+    The first caller runs fn(); everyone else arriving before it finishes
+    waits and gets the same result (or the same exception). A waiter only waits
+    as long as its own deadline allows, then raises DeadlineExceeded; the call
+    carries on for the others. Calls only coalesce within one priority lane, so
+    a user never ends up waiting on a warm-up call admitted as background work.
+    Named instances report their counters under /metrics.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+        if name:
+            with _registry_lock:
+                _registry[name] = self
+
+    def do(self, key, fn):
+        key = (llm_gateway.current_lane(), key)
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout=deadline.remaining()):
+                with self._lock:
+                    call.waiters -= 1
+                instrument.incr("dexter_deadline_exceeded_total", call=f"singleflight.{self.name}")
+                raise deadline.DeadlineExceeded(f"gave up waiting on a shared {self.name or 'call'} at the deadline")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+            }
+
+
+def _gauge():
+    with _registry_lock:
+        flights = dict(_registry)
+    return {
+        (("flight", name), ("stat", stat)): value
+        for name, flight in flights.items()
+        for stat, value in flight.stats().items()
+    }
+
+
+instrument.register_gauge("dexter_singleflight", _gauge)
@@ -0,0 +1,64 @@
+# File: utils/slack_stream.py
+
+import os
+import time
+import threading
+
+SLACK_STREAM_INTERVAL = float(os.getenv("SLACK_STREAM_INTERVAL", 1.0))
+PLACEHOLDER = "⏳ Looking into it..."
+
+
+class SlackStreamer:
+    """
+    Posts a placeholder message and then edits it in place as the answer grows.
+    Edits are throttled to one per `interval` seconds to stay inside chat.update rate limits.
+    The Key Metrics header, once set, stays on top of the streamed text.
+    """
+
+    def __init__(self, say, web_client, interval=SLACK_STREAM_INTERVAL):
+        self.say = say
+        self.web_client = web_client
+        self.interval = interval
+        self.channel = None
+        self.ts = None
+        self.header = ""
+        self.body = ""
+        self._last_update = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        response = self.say(PLACEHOLDER)
+        self.channel = response["channel"]
+        self.ts = response["ts"]
+
+    def set_header(self, header):
+        with self._lock:
+            self.header = header
+        self._update(force=True, typing=True)
+
+    def push(self, body):
+        with self._lock:
+            self.body = body
+        self._update(typing=True)
+
+    def finish(self, body):
+        with self._lock:
+            self.body = body
+        self._update(force=True)
+
+    def _render(self, typing):
+        parts = [p for p in (self.header, self.body) if p]
+        text = "\n\n".join(parts) if parts else PLACEHOLDER
+        return f"{text} ▌" if typing else text
+
+    def _update(self, force=False, typing=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_update < self.interval:
+                return
+            self._last_update = now
+            text = self._render(typing)
+        try:
+            self.web_client.chat_update(channel=self.channel, ts=self.ts, text=text)
+        except Exception as e:
+            print("⚠️ Slack message update failed:", str(e))